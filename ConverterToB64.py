@@ -2,24 +2,16 @@ from tkinter import *
 from tkinter import ttk
 from tkinter import filedialog
 import os
-import base64
-from tkinter.messagebox import showerror, showinfo
-import pyperclip
-import win32clipboard
-import struct
-import datetime
-# === Проверка: Windows? ===
 import sys
-IS_WINDOWS = sys.platform == "win32"
-
-# Попытка импорта pywin32 только на Windows
-pywin32_available = False
-if IS_WINDOWS:
-    try:
-        pywin32_available = True
-    except ImportError:
-        print("Библиотека pywin32 не найдена. Установите её: pip install pywin32")
-
+from tkinter.messagebox import showerror, showinfo
+import b64engine
+import b64batch
+import b64jobs
+import b64cache
+import b64journal
+import b64formats
+import b64scan
+import b64bundle
 # === Утилита: позиционирование окна рядом с курсором ===
 def place_window_near_cursor(window, width, height, dx=12, dy=12, screen_margin=20):
     """
@@ -61,6 +53,7 @@ def place_window_near_cursor(window, width, height, dx=12, dy=12, screen_margin=
     window.geometry(f"{width}x{height}+{win_x}+{win_y}")
 # === Глобальные переменные ===
 last_converted_file = None  # Для режима одного файла
+last_run_outputs = []  # Результаты последнего запуска в режиме нескольких файлов
 User_path = ""
 path = ""
 current_mode = None  # True — один файл, False — несколько
@@ -68,75 +61,29 @@ progress_bar = None
 main_window = None  # Главное окно (глобальное для доступа из функций)
 # Глобальные виджеты
 editor = None
+incremental_var = None
+bundle_var = None
+dedup_var = None
+format_var = None
 directory_label = None
 user_path_label = None
 convert_button = None
 result_label = None
 copy_text_button = None
-
-# === Копирование файлов с помощью pywin32 ===
-def copy_files_to_clipboard(file_paths):
-    """
-    Копирует список файлов в буфер обмена Windows в формате CF_HDROP (как делает Проводник).
-    Работает на всех версиях pywin32.
-    """
-    if not file_paths:
-        return False
-
-    try:
-        # 1. Нормализуем и проверяем существование файлов
-        valid_paths = []
-        for p in file_paths:
-            clean_path = os.path.abspath(os.path.normpath(p))
-            if os.path.exists(clean_path):
-                valid_paths.append(clean_path)
-            else:
-                print(f"Файл не найден: {clean_path}")
-        
-        if not valid_paths:
-            return False
-
-        # 2. Формируем DROPFILES структуру в байтах
-        # Структура DROPFILES (в байтах, little-endian):
-        #   DWORD pFiles;   // смещение к началу строк (обычно 20)
-        #   POINT pt;       // x=0, y=0 → 2×DWORD
-        #   BOOL fNC;       // 0
-        #   BOOL fWide;     // 1 → Unicode
-        dropfiles_header = struct.pack("IIIII", 20, 0, 0, 0, 1)
-
-        # 3. Собираем строки в UTF-16LE с завершающими нулями
-        # Формат: file1\0file2\0...\0\0
-        file_list = "\0".join(valid_paths) + "\0\0"
-        file_bytes = file_list.encode("utf-16le")
-
-        # 4. Объединяем заголовок и данные
-        clipboard_data = dropfiles_header + file_bytes
-
-        # 5. Копируем в буфер обмена
-        win32clipboard.OpenClipboard()
-        win32clipboard.EmptyClipboard()
-        win32clipboard.SetClipboardData(win32clipboard.CF_HDROP, clipboard_data)
-        win32clipboard.CloseClipboard()
-        return True
-
-    except Exception as e:
-        print(f"Ошибка при копировании файлов: {e}")
-        return False
+cancel_button = None
+workers = b64batch.DEFAULT_WORKERS  # Число параллельных воркеров в режиме нескольких файлов
 
 # === Вспомогательная функция: получить список сконвертированных файлов ===
 def get_converted_files(save_dir=None):
     """
-    Возвращает список .base64.txt файлов в каталоге сохранения.
+    Возвращает список .base64.txt файлов (и контейнеров .b64bundle.txt) в каталоге сохранения.
     По умолчанию использует выбранный каталог, иначе исходный (path).
     """
     target_dir = save_dir or User_path or path
     if not target_dir or not os.path.isdir(target_dir):
         return []
-    return [
-        os.path.join(target_dir, f)
-        for f in os.listdir(target_dir)
-        if f.endswith('.base64.txt')
-    ]
+    suffixes = (b64engine.OUTPUT_SUFFIX.lstrip("."), b64bundle.BUNDLE_SUFFIX.lstrip("."))
+    return [entry.path for entry in b64scan.scan(target_dir, suffixes)]
 
 # === Функции интерфейса ===
 
@@ -153,12 +100,22 @@ def select_user_dir():
 
 def copy_to_clipboard():
     if User_path:
+        # Модули буфера обмена загружаются при первом копировании, а не при запуске
+        import pyperclip
         pyperclip.copy(User_path)
         result_label.config(text="📋 Путь сохранения скопирован", bg="#c8f7c5")
     else:
         result_label.config(text="❌ Директория не выбрана", bg="#ffcccc")
 
+def watch_clipboard_task(future, on_done):
+    """Ждёт завершения фоновой операции с буфером обмена, не блокируя окно."""
+    if future.done():
+        on_done(future)
+    else:
+        main_window.after(POLL_INTERVAL_MS, watch_clipboard_task, future, on_done)
+
 def copy_converted_files():
+    import b64clipboard
     if current_mode is None:
         result_label.config(text="❌ Режим не определён", bg="#ffcccc")
         return
@@ -171,44 +128,123 @@ def copy_converted_files():
             result_label.config(text="❌ Нет последнего сконвертированного файла", bg="#ffcccc")
             return
     else:
-        # Режим нескольких файлов: копируем все .base64.txt из каталога сохранения (User_path или исходная path)
-        files = get_converted_files()
+        # Режим нескольких файлов: результаты последнего запуска; если запуска не было —
+        # все .base64.txt из каталога сохранения (User_path или исходная path)
+        files = list(last_run_outputs)
+
+    def export(files, target_dir):
         if not files:
-            result_label.config(text="❌ Нет сконвертированных файлов", bg="#ffcccc")
+            files = get_converted_files(target_dir)
+        if not files:
+            return None
+        return b64clipboard.copy_files(files)
+
+    def on_done(future):
+        try:
+            result = future.result()
+        except Exception as e:
+            result_label.config(text=f"❌ Не удалось скопировать: {e}", bg="#ffcccc")
             return
-
-    print("Попытка скопировать файлы:", files)
-
-    if IS_WINDOWS and pywin32_available:
-        success = copy_files_to_clipboard(files)
-        print("Результат копирования (pywin32):", success)
-        if success:
-            result_label.config(text=f"✅ Скопировано {len(files)} файл(ов)", bg="#c8f7c5")
+        if result is None:
+            result_label.config(text="❌ Нет сконвертированных файлов", bg="#ffcccc")
+        elif result.kind == "files":
+            result_label.config(text=f"✅ Скопировано {result.count} файл(ов)", bg="#c8f7c5")
             showinfo("Готово", "Файлы скопированы! Вставьте в проводник (Ctrl+V).")
         else:
-            pyperclip.copy('\n'.join(files))
-            result_label.config(text="⚠️ Скопировано как текст", bg="#ffeaa7")
-    else:
-        pyperclip.copy('\n'.join(files))
-        result_label.config(text="📋 Пути скопированы (как текст)", bg="#ffeaa7")
+            result_label.config(text="📋 Пути скопированы (как текст)", bg="#ffeaa7")
+
+    result_label.config(text="Копирую в буфер обмена...", bg="#d1ecf1")
+    future = b64clipboard.submit(export, files, User_path or path)
+    watch_clipboard_task(future, on_done)
 
 def copy_last_converted_text():
     """
     Копирует содержимое последнего сконвертированного файла (one file mode) как строку.
+    Слишком большой файл копируется как файл (см. b64clipboard.TEXT_COPY_LIMIT).
     """
+    import b64clipboard
     if not last_converted_file or not os.path.exists(last_converted_file):
         result_label.config(text="❌ Нет последнего сконвертированного файла", bg="#ffcccc")
         return
-    try:
-        with open(last_converted_file, "r", encoding="utf-8") as f:
-            data = f.read()
-        pyperclip.copy(data)
-        result_label.config(text="📋 Содержимое скопировано в буфер обмена", bg="#c8f7c5")
-    except Exception as e:
-        result_label.config(text=f"❌ Не удалось скопировать: {e}", bg="#ffcccc")
+
+    def on_done(future):
+        try:
+            result = future.result()
+        except Exception as e:
+            result_label.config(text=f"❌ Не удалось скопировать: {e}", bg="#ffcccc")
+            return
+        if result.kind == "text":
+            result_label.config(text="📋 Содержимое скопировано в буфер обмена", bg="#c8f7c5")
+        else:
+            limit_mb = b64clipboard.TEXT_COPY_LIMIT // (1024 * 1024)
+            what = "файл" if result.kind == "files" else "путь к файлу"
+            result_label.config(text=f"⚠️ Файл больше {limit_mb} МиБ — скопирован {what}", bg="#ffeaa7")
+
+    result_label.config(text="Копирую в буфер обмена...", bg="#d1ecf1")
+    watch_clipboard_task(b64clipboard.submit(b64clipboard.copy_text_file, last_converted_file), on_done)
+
+# Подписи вариантов вывода в интерфейсе → ключи b64formats.PRESETS
+FORMAT_LABELS = {
+    "Стандартный Base64": "standard",
+    "URL-safe (для API)": "urlsafe",
+    "MIME (строки по 76 символов)": "mime",
+    "data: URI (для HTML)": "data-uri",
+    "Сжатие zlib + Base64": "zlib",
+}
+if b64formats.zstd_available:
+    FORMAT_LABELS["Сжатие zstd + Base64"] = "zstd"
+
+POLL_INTERVAL_MS = 50  # Период опроса очереди событий фонового задания
+current_job = None  # Текущее фоновое задание конвертации
+
+def selected_output_format():
+    return b64formats.PRESETS[FORMAT_LABELS[format_var.get()]]
+
+def start_job(job, result_label_widget, on_file, on_finished):
+    """
+    Запускает фоновое задание (b64jobs.ConversionJob) и опрашивает его очередь через after().
+    Главный цикл Tk не блокируется, прогресс отображается в байтах.
+    """
+    global current_job
+    current_job = job.start()
+    progress_bar['value'] = 0
+    progress_bar['maximum'] = 1
+    progress_bar.pack(anchor=W, padx=20, pady=(0, 10))
+    cancel_button.config(state="normal")
+    cancel_button.pack(anchor=W, padx=20, pady=(0, 10))
+    convert_button.config(state="disabled")
+    main_window.after(POLL_INTERVAL_MS, poll_job, current_job, result_label_widget, on_file, on_finished)
+    return current_job
+
+def poll_job(job, result_label_widget, on_file, on_finished):
+    global current_job
+    # Общий объём растёт, пока идёт обход директории
+    progress_bar['maximum'] = max(job.total_bytes, 1)
+    for event in b64jobs.drain_events(job):
+        if event[0] == "progress":
+            progress_bar['value'] = event[1]
+        elif event[0] == "file":
+            on_file(event[1])
+        elif event[0] == "error":
+            result_label_widget.config(text=f"❌ Ошибка: {event[1]}", bg="#ffcccc")
+            showerror("Ошибка", f"Конвертация прервана:\n{event[1]}")
+        elif event[0] == "finished":
+            current_job = None
+            progress_bar.pack_forget()
+            cancel_button.pack_forget()
+            update_button_states()
+            if event[2]:
+                result_label_widget.config(text=f"⏹ Конвертация отменена. Готово файлов: {event[1]}", bg="#ffeaa7")
+            on_finished(event[1], event[2])
+            return
+    main_window.after(POLL_INTERVAL_MS, poll_job, job, result_label_widget, on_file, on_finished)
+
+def cancel_current_job():
+    if current_job is not None:
+        current_job.cancel()
+        cancel_button.config(state="disabled")
 
 def one_file_convert(result_label_widget):
-    global progress_bar, last_converted_file  # ← добавили last_converted_file
     file = filedialog.askopenfilename(
         title="Выберите файл для конвертации",
         filetypes=[("Все файлы", "*.*")]
@@ -216,38 +252,23 @@ def one_file_convert(result_label_widget):
     if not file:
         return
 
-    progress_bar.pack(anchor=W, padx=20, pady=(0, 10))
+    save_dir = User_path if User_path else os.path.dirname(file)
+    output_path = b64engine.build_output_path(file, save_dir)
     result_label_widget.config(text="Конвертирую файл...", bg="#d1ecf1")
-    main_window.update_idletasks()
 
-    try:
-        with open(file, "rb") as f:
-            file_data = f.read()
-        base64_string = base64.b64encode(file_data).decode("utf-8")
+    def on_file(result):
+        global last_converted_file
+        if result.error is None:
+            # ✅ Сохраняем путь к последнему сконвертированному файлу
+            last_converted_file = result.output
+            result_label_widget.config(text=f"✅ Файл успешно сконвертирован!\n{result.output}", bg="#c8f7c5")
+            showinfo("Успех", f"Файл сохранён как:\n{result.output}")
+        elif not isinstance(result.error, b64engine.ConversionCancelled):
+            result_label_widget.config(text=f"❌ Ошибка: {result.error}", bg="#ffcccc")
+            showerror("Ошибка", f"Не удалось сконвертировать файл:\n{result.error}")
 
-        save_dir = User_path if User_path else os.path.dirname(file)
-        output_filename = f"{os.path.splitext(os.path.basename(file))[0]}-{datetime.date.today()}.base64.txt"
-        output_path = os.path.join(save_dir, output_filename)
-
-        with open(output_path, "w", encoding="utf-8") as output_file:
-            output_file.write(base64_string)
-
-        # ✅ Сохраняем путь к последнему сконвертированному файлу
-        last_converted_file = output_path
-        update_button_states()
-
-        progress_bar['value'] = 1
-        progress_bar['maximum'] = 1
-        main_window.update_idletasks()
-
-        result_label_widget.config(text=f"✅ Файл успешно сконвертирован!\n{output_path}", bg="#c8f7c5")
-        showinfo("Успех", f"Файл сохранён как:\n{output_path}")
-
-    except Exception as e:
-        result_label_widget.config(text=f"❌ Ошибка: {e}", bg="#ffcccc")
-        showerror("Ошибка", f"Не удалось сконвертировать файл:\n{e}")
-    finally:
-        progress_bar.pack_forget()
+    job = b64jobs.ConversionJob([(file, output_path)], workers=workers, output_format=selected_output_format())
+    start_job(job, result_label_widget, on_file, lambda count, cancelled: None)
 
 def open_directory():
     global path
@@ -258,68 +279,135 @@ def open_directory():
         update_button_states()
 
 def encode_dir(result_label_widget):
-    global progress_bar
     if not path:
         showerror(title="Ошибка", message="Сначала выберите исходную директорию!")
         return
 
-    extension = editor.get("1.0", END).strip()
-
-    files_to_process = []
-    for file in os.listdir(path):
-        file_path = os.path.join(path, file)
-        if os.path.isfile(file_path) and (not extension or file.endswith(f".{extension}")):
-            files_to_process.append(file)
+    extensions = b64scan.parse_extensions(editor.get("1.0", END))
+    save_dir = User_path if User_path else path
 
-    if not files_to_process:
-        result_label_widget.config(text="❌ Нет подходящих файлов", bg="#ffcccc")
+    if bundle_var.get():
+        bundle_dir(result_label_widget, extensions, save_dir)
         return
 
-    total = len(files_to_process)
-    progress_bar['maximum'] = total
-    progress_bar.pack(anchor=W, padx=20, pady=(0, 10))
-    result_label_widget.config(text=f"Начинаю конвертацию {total} файлов...", bg="#fff3cd")
-    main_window.update_idletasks()
+    # Директория обходится лениво в фоновом потоке: конвертация начинается
+    # сразу, не дожидаясь окончания обхода
+    jobs = (
+        (entry.path, b64engine.build_output_path(entry.path, save_dir), entry.size)
+        for entry in b64scan.scan(path, extensions, exclude=b64scan.OWN_OUTPUT_PATTERNS)
+    )
 
-    count = 0
-    try:
-        for file in files_to_process:
-            file_path = os.path.join(path, file)
-            try:
-                with open(file_path, "rb") as f:
-                    file_data = f.read()
-                base64_string = base64.b64encode(file_data).decode("utf-8")
-
-                save_dir = User_path if User_path else path
-                output_filename = f"{os.path.splitext(file)[0]}-{datetime.date.today()}.base64.txt"
-                output_path = os.path.join(save_dir, output_filename)
-
-                with open(output_path, "w", encoding="utf-8") as output_file:
-                    output_file.write(base64_string)
-
-                count += 1
-                progress_bar['value'] = count
-                result_label_widget.config(text=f"Обработано: {count} из {total}", bg="#d1ecf1")
-                main_window.update_idletasks()
-
-            except Exception as e:
-                result_label_widget.config(text=f"⚠️ Ошибка при обработке '{file}': {e}", bg="#ffeaa7")
-                main_window.update_idletasks()
+    # Инкрементальный режим: неизменённые с прошлого запуска файлы пропускаются
+    cache = None
+    if incremental_var.get():
+        cache = b64cache.IncrementalCache(output_format=selected_output_format())
+        jobs = cache.select(jobs)
+
+    # Журнал запуска: если прошлый запуск в эту папку был прерван,
+    # уже готовые файлы пропускаются и конвертация продолжается с первого незавершённого
+    journal = b64journal.JobJournal(
+        os.path.join(save_dir, b64journal.JOURNAL_NAME),
+        run_key={"source": os.path.abspath(path), "extensions": extensions, "format": selected_output_format()},
+    )
+    jobs = journal.select(jobs)
 
+    result_label_widget.config(text="Начинаю конвертацию...", bg="#fff3cd")
+    last_run_outputs.clear()
+    count = 0
+    errors = 0
+    job = None
+
+    def on_file(result):
+        nonlocal count, errors
+        if result.error is None:
+            count += 1
+            last_run_outputs.append(result.output)
+            journal.record(result)
+            if cache:
+                cache.record(result)
+            total = f"{job.scanned}+" if job.scanning else job.scanned
+            result_label_widget.config(text=f"Обработано: {count} из {total}", bg="#d1ecf1")
+        elif not isinstance(result.error, b64engine.ConversionCancelled):
+            errors += 1
+            file = os.path.basename(result.source)
+            result_label_widget.config(text=f"⚠️ Ошибка при обработке '{file}': {result.error}", bg="#ffeaa7")
+
+    def on_finished(count, cancelled):
+        skipped = cache.skipped if cache else []
+        resumed = journal.skipped
+        # Пропущенные файлы тоже входят в результаты запуска
+        last_run_outputs.extend(output for _, output in skipped + resumed)
+        if cache:
+            cache.save()
+        # Прерванный или завершившийся с ошибками запуск можно продолжить — журнал остаётся
+        if cancelled or errors or job.error:
+            journal.close()
+        else:
+            journal.complete()
+        # О сбое задания уже сообщил poll_job
+        if cancelled or job.error:
+            return
+        if not job.scanned and not skipped and not resumed:
+            result_label_widget.config(text="❌ Нет подходящих файлов", bg="#ffcccc")
+            return
+        if not job.scanned:
+            result_label_widget.config(text=f"✅ Все файлы без изменений, пропущено: {len(skipped) + len(resumed)}",
+                                       bg="#c8f7c5")
+            return
         result_label_widget.config(text=f"✅ Успешно сконвертировано {count} файлов!", bg="#c8f7c5")
-        showinfo("Готово!", f"Конвертация завершена!\nСохранено файлов: {count}")
+        message = f"Конвертация завершена!\nСохранено файлов: {count}"
+        if resumed:
+            message += f"\nГотово с прерванного запуска: {len(resumed)}"
+        if skipped:
+            message += f"\nПропущено без изменений: {len(skipped)}"
+        showinfo("Готово!", message)
+
+    # Файлы конвертируются параллельно в фоне, результаты приходят по мере готовности.
+    # Планирование по размерам: крупные файлы первыми, мелкие пачками, очень крупные —
+    # диапазонами на всех ядрах, чтобы один большой файл не задерживал конец конвертации.
+    # С дедупликацией одинаковые файлы кодируются один раз, остальные результаты — жёсткие ссылки
+    job = b64jobs.ConversionJob(
+        jobs, workers=workers, output_format=selected_output_format(),
+        dedup="link" if dedup_var.get() else None, schedule="size",
+    )
+    start_job(job, result_label_widget, on_file, on_finished)
+
+def bundle_dir(result_label_widget, extensions, save_dir):
+    """Упаковывает все подходящие файлы директории в один контейнер .b64bundle.txt."""
+    output_path = b64bundle.build_bundle_path(path, save_dir)
+    entries = (
+        (entry.path, os.path.relpath(entry.path, path).replace(os.sep, "/"), entry.size)
+        for entry in b64scan.scan(path, extensions, exclude=b64scan.OWN_OUTPUT_PATTERNS)
+    )
+    result_label_widget.config(text="Упаковываю файлы в контейнер...", bg="#fff3cd")
+    last_run_outputs.clear()
+
+    def on_file(result):
+        if result.error is None:
+            last_run_outputs.append(result.output)
+            result_label_widget.config(text=f"✅ Контейнер записан!\n{result.output}", bg="#c8f7c5")
+        elif not isinstance(result.error, b64engine.ConversionCancelled):
+            result_label_widget.config(text=f"❌ Ошибка упаковки: {result.error}", bg="#ffcccc")
+
+    def on_finished(count, cancelled):
+        if cancelled:
+            return
+        if not count and not job.scanned:
+            result_label_widget.config(text="❌ Нет подходящих файлов", bg="#ffcccc")
+        elif count:
+            showinfo("Готово!", f"Упаковано файлов: {count}\nКонтейнер:\n{output_path}")
 
-    except Exception as e:
-        result_label_widget.config(text=f"❌ Критическая ошибка: {e}", bg="#ffcccc")
-        showerror("Ошибка", f"Не удалось завершить конвертацию:\n{e}")
-    finally:
-        progress_bar.pack_forget()
+    job = b64jobs.BundleJob(entries, path, output_path)
+    start_job(job, result_label_widget, on_file, on_finished)
 
 def update_button_states():
     global copy_text_button
     if current_mode is None:
         return
-    if current_mode:
+    if current_job is not None:
+        # Пока идёт фоновая конвертация, новую не запускаем
+        convert_button.config(state="disabled")
+    elif current_mode:
         convert_button.config(state="normal")
         if copy_text_button:
             copy_text_button.config(state="normal" if last_converted_file else "disabled")
@@ -329,16 +417,19 @@ def update_button_states():
 def start_one_file_window():
     global last_converted_file
     last_converted_file = None
+    last_run_outputs.clear()
     ask_window.destroy()
     create_main_window(one_file_mode=True)
 
 def start_multiple_files_window():
     global last_converted_file
     last_converted_file = None
+    last_run_outputs.clear()
     ask_window.destroy()
     create_main_window(one_file_mode=False)
 
 def go_back_to_ask_window(window_to_close):
+    cancel_current_job()
     window_to_close.destroy()
     create_ask_window()
 
@@ -366,11 +457,17 @@ def show_help_window():
    - «📄 Копировать содержимое как строку» — чтобы вставить Base64 в код/чат.
 
 🔹 Режим "Конвертировать несколько файлов"
-1. Укажите формат (например: pdf) или оставьте пустым для всех файлов.
+1. Укажите формат (например: pdf или несколько: pdf docx) или оставьте пустым для всех файлов.
 2. Нажмите "📁 Выбрать исходную директорию".
 3. Нажмите "🔄 Конвертировать файлы".
 4. Результаты сохранятся в указанной папке (или в исходной).
 5. Нажмите «📎 Копировать результаты», чтобы вставить все сконвертированные файлы в другую папку.
+6. Флажок «Пропускать файлы без изменений» не перекодирует файлы, которые не менялись
+   с прошлого запуска (сведения хранятся в .b64manifest.json в папке сохранения).
+   Флажок «Одинаковые файлы кодировать один раз» кодирует повторяющееся содержимое
+   однократно, а остальные результаты создаёт жёсткими ссылками (или копиями).
+7. Флажок «Упаковать в один контейнер» записывает все файлы в один .b64bundle.txt
+   с оглавлением — вместо тысяч отдельных файлов.
 
 🔹 Папка сохранения (опционально)
 - Если не указана — файлы сохраняются в исходной директории.
@@ -378,6 +475,12 @@ def show_help_window():
 
 🔹 Советы
 - Имена файлов дополняются датой (например: doc-2025-04-05.base64.txt).
+- Файлы папки обрабатываются от крупных к мелким, а очень большие файлы
+  кодируются частями сразу на всех ядрах процессора.
+- Результаты появляются только целиком. Если конвертация папки прервалась,
+  повторный запуск в ту же папку продолжит с первого незавершённого файла.
+- «Формат результата»: URL-safe алфавит для API, MIME-строки по 76 символов для почты,
+  data: URI для встраивания в HTML или сжатие перед кодированием.
 - Все файлы копируются в формате, понятном Проводнику Windows (требуется pywin32).
 - При ошибке копирования — путь/содержимое копируется как текст.
 """
@@ -403,12 +506,12 @@ def create_ask_window():
 
 def create_main_window(one_file_mode):
     global main_window, current_mode, progress_bar
-    global editor, directory_label, user_path_label, convert_button, result_label, copy_text_button
+    global editor, incremental_var, bundle_var, dedup_var, format_var, directory_label, user_path_label, convert_button, result_label, copy_text_button, cancel_button
 
     current_mode = one_file_mode
     main_window = Tk()
     main_window.title("Конвертер файлов в Base64")
-    place_window_near_cursor(main_window, 500, 530 if one_file_mode else 630, screen_margin=100)
+    place_window_near_cursor(main_window, 500, 565 if one_file_mode else 745, screen_margin=100)
     main_window.resizable(False, False)
     main_window.configure(bg="#ffffff")
 
@@ -429,6 +532,20 @@ def create_main_window(one_file_mode):
     )
     user_path_label.pack(anchor=W)
 
+    # Выбор варианта вывода (стандартный, URL-safe, MIME, data: URI, со сжатием)
+    format_row = Frame(save_frame, bg="#ffffff")
+    format_row.pack(anchor=W, pady=(6, 0))
+    Label(format_row, text="Формат результата:", font=("Segoe UI", 9), bg="#ffffff").pack(side=LEFT)
+    format_var = StringVar(value=next(iter(FORMAT_LABELS)))
+    format_box = ttk.Combobox(
+        format_row,
+        textvariable=format_var,
+        values=list(FORMAT_LABELS),
+        state="readonly",
+        width=32
+    )
+    format_box.pack(side=LEFT, padx=(6, 0))
+
     # Блок: источник
     source_frame = ttk.LabelFrame(main_window, text="Что конвертируем", padding=(10, 8))
     source_frame.pack(anchor=W, padx=20, pady=(0, 10), fill=X)
@@ -439,7 +556,7 @@ def create_main_window(one_file_mode):
     else:
         instruction = Label(
             source_frame,
-            text="Введите формат файлов для фильтрации(например: docx)\nОставьте пустым — чтобы сконвертировать ВСЕ файлы:",
+            text="Введите формат файлов для фильтрации(например: docx или pdf docx)\nОставьте пустым — чтобы сконвертировать ВСЕ файлы:",
             font=("Segoe UI", 10),
             bg="#ffffff",
             fg="#7f8c8d",
@@ -447,9 +564,40 @@ def create_main_window(one_file_mode):
         )
         instruction.pack(anchor=W, pady=(0, 5))
 
-        editor = Text(source_frame, height=1, width=15, wrap=WORD, font=("Segoe UI", 10), relief="groove", bd=2)
+        editor = Text(source_frame, height=1, width=25, wrap=WORD, font=("Segoe UI", 10), relief="groove", bd=2)
         editor.pack(anchor=W, pady=(0, 8))
 
+        incremental_var = BooleanVar(value=False)
+        ttk.Checkbutton(
+            source_frame,
+            text="Пропускать файлы без изменений с прошлой конвертации",
+            variable=incremental_var
+        ).pack(anchor=W, pady=(0, 4))
+
+        dedup_var = BooleanVar(value=False)
+        ttk.Checkbutton(
+            source_frame,
+            text="Одинаковые файлы кодировать один раз (остальные — ссылкой)",
+            variable=dedup_var
+        ).pack(anchor=W, pady=(0, 4))
+
+        bundle_var = BooleanVar(value=False)
+
+        def on_bundle_toggle():
+            # Контейнер пишется только стандартным Base64 — выбор формата для него недоступен
+            if bundle_var.get():
+                format_var.set(next(iter(FORMAT_LABELS)))
+                format_box.config(state="disabled")
+            else:
+                format_box.config(state="readonly")
+
+        ttk.Checkbutton(
+            source_frame,
+            text="Упаковать все файлы в один контейнер (.b64bundle.txt)",
+            variable=bundle_var,
+            command=on_bundle_toggle
+        ).pack(anchor=W, pady=(0, 8))
+
         open_directory_button = ttk.Button(source_frame, text="📁 Выбрать исходную директорию", command=open_directory)
         open_directory_button.pack(anchor=W, pady=(0, 5))
         directory_label = Label(source_frame, text="Исходная директория не выбрана", font=("Segoe UI", 9), bg="#ffffff", fg="#e74c3c")
@@ -479,6 +627,8 @@ def create_main_window(one_file_mode):
     progress_bar.pack(anchor=W, padx=20, pady=(0, 10))
     progress_bar.pack_forget()
 
+    cancel_button = ttk.Button(main_window, text="⏹ Отменить конвертацию", command=cancel_current_job)
+
     result_label = Label(
         main_window,
         text="Здесь появится результат работы программы",
@@ -509,4 +659,9 @@ def create_main_window(one_file_mode):
     main_window.mainloop()
 
 if __name__ == "__main__":
+    # Нужно для пула процессов в собранном exe (PyInstaller) на Windows;
+    # при запуске скрипта multiprocessing не загружается
+    if getattr(sys, "frozen", False):
+        import multiprocessing
+        multiprocessing.freeze_support()
     create_ask_window()
\ No newline at end of file
@@ -0,0 +1,343 @@
+import io
+import os
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import b64engine
+import b64batch
+import b64formats
+import b64scan
+import b64dedup
+import b64verify
+
+# === Программный интерфейс ===
+# Библиотечные функции для вызова из других программ без запуска процесса
+# на каждый файл. Импорт не создаёт потоков и не загружает tkinter, pyperclip
+# и win32clipboard — всё это нужно только графическому интерфейсу.
+#
+# on_progress во всех функциях получает общее число обработанных байт исходных
+# данных и вызывается из рабочего потока; в asyncio-коде передавайте в основной
+# цикл через loop.call_soon_threadsafe.
+#
+# Асинхронные варианты выполняются в общем пуле потоков (get_executor),
+# который создаётся при первом обращении.
+
+ConvertResult = b64batch.ConvertResult
+OutputFormat = b64formats.OutputFormat
+PRESETS = b64formats.PRESETS
+ConversionCancelled = b64engine.ConversionCancelled
+InvalidBase64Error = b64engine.InvalidBase64Error
+VerifyResult = b64verify.VerifyResult
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Общий пул потоков для асинхронных функций (создаётся лениво)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=b64batch.DEFAULT_WORKERS, thread_name_prefix="b64api")
+        return _executor
+
+
+def shutdown(wait=True):
+    """Останавливает общий пул; при следующем вызове он будет создан заново."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
+
+
+def _resolve_format(output_format):
+    if output_format is None:
+        return b64formats.PLAIN
+    if isinstance(output_format, str):
+        return b64formats.PRESETS[output_format]
+    return b64formats.validate_format(output_format)
+
+
+# === Синхронные функции ===
+
+def encode_bytes(data, output_format=None, mime_type="application/octet-stream"):
+    """
+    Кодирует байты в Base64.
+
+    :param output_format: OutputFormat или имя пресета из PRESETS; None — стандартный Base64
+    :param mime_type: тип для формата data: URI
+    :return: bytes
+    """
+    dst = io.BytesIO()
+    b64formats.encode_stream(io.BytesIO(data), dst, _resolve_format(output_format), mime_type=mime_type)
+    return dst.getvalue()
+
+
+def decode_bytes(data, output_format=None):
+    """
+    Строго декодирует Base64 (пробельные символы допускаются); ошибка — InvalidBase64Error.
+
+    :param output_format: OutputFormat или имя пресета, в котором закодированы данные
+    """
+    dst = io.BytesIO()
+    b64formats.decode_stream(io.BytesIO(data), dst, _resolve_format(output_format))
+    return dst.getvalue()
+
+
+def encode_stream(src, dst, output_format=None, on_progress=None, cancel_event=None,
+                  mime_type="application/octet-stream"):
+    """
+    Кодирует бинарный поток src в бинарный поток dst.
+
+    :param cancel_event: объект с методом is_set(); при отмене — ConversionCancelled
+    :return: количество прочитанных байт
+    """
+    return b64formats.encode_stream(src, dst, _resolve_format(output_format), on_progress=on_progress,
+                                    cancel_event=cancel_event, mime_type=mime_type)
+
+
+def decode_stream(src, dst, on_progress=None, cancel_event=None, output_format=None):
+    """
+    Декодирует бинарный поток Base64 src в dst.
+
+    :param output_format: OutputFormat или имя пресета, в котором закодированы данные
+    :return: количество записанных байт
+    """
+    return b64formats.decode_stream(src, dst, _resolve_format(output_format), on_progress=on_progress,
+                                    cancel_event=cancel_event)
+
+
+def encode_file(source_path, output_path=None, save_dir=None, output_format=None, on_progress=None,
+                cancel_event=None, use_mmap=None):
+    """
+    Кодирует файл. Ошибки не пробрасываются, а возвращаются в поле error.
+
+    :param output_path: путь результата; None — <имя>-<дата>.base64.txt в save_dir
+        (или рядом с исходным файлом)
+    :return: ConvertResult
+    """
+    if output_path is None:
+        output_path = b64engine.build_output_path(source_path, save_dir)
+    return _convert_file(source_path, output_path, on_progress, cancel_event, use_mmap, False,
+                         _resolve_format(output_format))
+
+
+def decode_file(source_path, output_path=None, save_dir=None, extension=None, on_progress=None,
+                cancel_event=None, output_format=None):
+    """
+    Декодирует .base64.txt обратно в двоичный файл.
+
+    :param extension: расширение восстановленного файла (в имени .base64.txt его нет)
+    :param output_format: OutputFormat или имя пресета, в котором закодирован файл
+    :return: ConvertResult
+    """
+    if output_path is None:
+        output_path = b64engine.build_decoded_path(source_path, save_dir, extension)
+    return _convert_file(source_path, output_path, on_progress, cancel_event, None, True,
+                         _resolve_format(output_format))
+
+
+def _convert_file(source_path, output_path, on_progress, cancel_event, use_mmap, decode, output_format):
+    done = 0
+
+    def report(delta):
+        nonlocal done
+        done += delta
+        on_progress(done)
+
+    save_dir = os.path.dirname(output_path)
+    if save_dir:
+        os.makedirs(save_dir, exist_ok=True)
+    return b64batch.convert_one(
+        source_path, output_path, report if on_progress else None, cancel_event, use_mmap, decode, output_format,
+    )
+
+
+def ensure_output_dirs(jobs):
+    """Создаёт каталоги результатов по мере прохождения заданий."""
+    created = set()
+    for job in jobs:
+        save_dir = os.path.dirname(job[1])
+        if save_dir and save_dir not in created:
+            os.makedirs(save_dir, exist_ok=True)
+            created.add(save_dir)
+        yield job
+
+
+def directory_jobs(root, save_dir=None, extensions=None, recursive=False, include=None, exclude=None,
+                   decode=False, restore_ext=None, on_error=None):
+    """
+    Лениво выдаёт задания (исходный путь, путь результата, размер) для директории.
+    С save_dir структура поддиректорий сохраняется. При декодировании берутся
+    только файлы .base64.txt, при кодировании собственные результаты пропускаются.
+    """
+    exclude = list(exclude or [])
+    if decode:
+        extensions = (b64engine.OUTPUT_SUFFIX.lstrip("."),)
+    else:
+        exclude += b64scan.OWN_OUTPUT_PATTERNS
+    for entry in b64scan.scan(root, extensions, recursive, include, exclude, on_error):
+        target_dir = os.path.dirname(entry.path)
+        if save_dir:
+            relative = os.path.relpath(target_dir, root)
+            target_dir = os.path.normpath(os.path.join(save_dir, relative))
+        if decode:
+            output_path = b64engine.build_decoded_path(entry.path, target_dir, restore_ext)
+        else:
+            output_path = b64engine.build_output_path(entry.path, target_dir)
+        yield entry.path, output_path, entry.size
+
+
+def encode_directory(root, save_dir=None, extensions=None, recursive=False, include=None, exclude=None,
+                     workers=None, output_format=None, on_progress=None, cancel_event=None, use_mmap=None,
+                     decode=False, restore_ext=None, dedup=None, recorder=None, schedule="stream"):
+    """
+    Конвертирует файлы директории параллельно и выдаёт ConvertResult по мере готовности.
+    Обход ленивый: с schedule="stream" конвертация начинается до его окончания.
+
+    :param extensions: расширения без точки; None — все файлы
+    :param include: glob-шаблоны отбора файлов
+    :param exclude: glob-шаблоны исключения файлов и поддиректорий
+    :param decode: декодировать найденные .base64.txt (в формате output_format) вместо кодирования
+    :param dedup: режим b64dedup ("link", "copy", "manifest"); None — без дедупликации
+    :param recorder: b64stats.RunRecorder — включает замеры (ConvertResult.stats);
+        результаты в него заносит вызывающий
+    :param schedule: "stream" — в порядке обхода; "size" — после обхода, крупные файлы
+        первыми, мелкие пачками, очень крупные — диапазонами (b64batch.convert_scheduled)
+    :return: генератор ConvertResult
+    """
+    output_format = _resolve_format(output_format)
+    jobs = ensure_output_dirs(directory_jobs(
+        root, save_dir, extensions, recursive, include, exclude, decode, restore_ext,
+    ))
+    report = _total_reporter(on_progress)
+    if dedup:
+        convert = functools.partial(b64dedup.convert_deduplicated, mode=dedup, schedule=schedule)
+    else:
+        convert = b64batch.SCHEDULES[schedule]
+    yield from convert(
+        jobs, workers=workers, on_progress=report, cancel_event=cancel_event,
+        use_mmap=use_mmap, decode=decode, output_format=output_format, recorder=recorder,
+    )
+
+
+def verify_file(source_path, output_path=None, save_dir=None, output_format=None, on_progress=None,
+                cancel_event=None):
+    """
+    Потоково сверяет результат с исходным файлом (см. b64verify).
+
+    :param output_path: путь результата; None — самый свежий <имя>-<дата>.base64.txt
+        в save_dir (или рядом с исходным файлом)
+    :param output_format: формат, в котором создан результат
+    :return: VerifyResult; status — b64verify.VERIFY_OK, VERIFY_MISMATCH,
+        VERIFY_TRUNCATED, VERIFY_MISSING или VERIFY_ERROR
+    """
+    if output_path is None:
+        output_path = b64verify.OutputIndex().find(source_path, b64engine.build_output_path(source_path, save_dir))
+    return b64verify.verify_file(source_path, output_path, _resolve_format(output_format),
+                                 on_progress=on_progress, cancel_event=cancel_event)
+
+
+def verify_directory(root, save_dir=None, extensions=None, recursive=False, include=None, exclude=None,
+                     workers=None, output_format=None, on_progress=None, cancel_event=None):
+    """
+    Параллельно сверяет результаты файлов директории (отбор файлов — как в encode_directory)
+    и выдаёт VerifyResult по мере готовности, включая файлы без результата.
+    """
+    jobs = b64verify.locate_outputs(directory_jobs(root, save_dir, extensions, recursive, include, exclude))
+    yield from b64verify.verify_many(jobs, workers, _resolve_format(output_format), _total_reporter(on_progress),
+                                     cancel_event)
+
+
+def _total_reporter(on_progress):
+    """Переводит приросты из пакетных функций в общее число байт (его получает on_progress)."""
+    if on_progress is None:
+        return None
+    done = 0
+    lock = threading.Lock()
+
+    def report(delta):
+        nonlocal done
+        with lock:
+            done += delta
+            total = done
+        on_progress(total)
+
+    return report
+
+
+# === Асинхронные функции ===
+
+async def _run(function, *args, **kwargs):
+    # asyncio загружается при первом асинхронном вызове: его импорт дорог для CLI
+    import asyncio
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), lambda: function(*args, **kwargs))
+
+
+async def encode_bytes_async(data, output_format=None, mime_type="application/octet-stream"):
+    return await _run(encode_bytes, data, output_format, mime_type)
+
+
+async def decode_bytes_async(data, output_format=None):
+    return await _run(decode_bytes, data, output_format)
+
+
+async def encode_file_async(source_path, output_path=None, **kwargs):
+    """Асинхронный encode_file; параметры те же."""
+    return await _run(encode_file, source_path, output_path, **kwargs)
+
+
+async def decode_file_async(source_path, output_path=None, **kwargs):
+    """Асинхронный decode_file; параметры те же."""
+    return await _run(decode_file, source_path, output_path, **kwargs)
+
+
+async def verify_file_async(source_path, output_path=None, **kwargs):
+    """Асинхронный verify_file; параметры те же."""
+    return await _run(verify_file, source_path, output_path, **kwargs)
+
+
+async def encode_directory_async(root, **kwargs):
+    """
+    Асинхронный encode_directory: асинхронный генератор ConvertResult.
+    Если перебор прерван (break, отмена задачи), конвертация отменяется.
+    """
+    async for result in _iterate_async(encode_directory, root, **kwargs):
+        yield result
+
+
+async def verify_directory_async(root, **kwargs):
+    """Асинхронный verify_directory: асинхронный генератор VerifyResult."""
+    async for result in _iterate_async(verify_directory, root, **kwargs):
+        yield result
+
+
+async def _iterate_async(function, root, **kwargs):
+    import asyncio
+    loop = asyncio.get_running_loop()
+    cancel_event = kwargs.pop("cancel_event", None) or threading.Event()
+    results = function(root, cancel_event=cancel_event, **kwargs)
+    sentinel = object()
+    finished = False
+    step = None
+    try:
+        while True:
+            # shield: при отмене задачи future шага не отменяется, и его можно дождаться
+            step = loop.run_in_executor(get_executor(), next, results, sentinel)
+            result = await asyncio.shield(step)
+            if result is sentinel:
+                finished = True
+                break
+            yield result
+    finally:
+        if not finished:
+            cancel_event.set()
+            # Генератор нельзя закрыть, пока next() ещё выполняется в пуле
+            if step is not None:
+                await asyncio.wait([step])
+                if not step.cancelled():
+                    step.exception()
+            await _run(results.close)
@@ -0,0 +1,580 @@
+import os
+import time
+import queue
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import b64engine
+import b64formats
+import b64stats
+
+# === Параллельная пакетная конвертация ===
+# Мелкие файлы упираются в ввод-вывод — их обрабатывает пул потоков.
+# Крупные файлы упираются в процессор (кодирование) — их отдаём пулу процессов,
+# чтобы обойти GIL. Результаты возвращаются по мере готовности.
+#
+# convert_many берёт файлы в порядке обхода. convert_scheduled сначала дожидается
+# всего списка и планирует по размерам (plan_tasks): крупные файлы идут первыми,
+# и в конце не остаётся одного долгого файла при простаивающих воркерах; мелкие
+# объединяются в пачки, чтобы не платить накладные расходы задания за каждый;
+# очень крупный файл делится на диапазоны, кратные 3 байтам, — они кодируются
+# параллельно и пишутся по заранее вычисленным смещениям результата.
+# После каждого готового диапазона сохраняется контрольная точка со списком
+# готовых диапазонов: запуск, прерванный завершением процесса или
+# KeyboardInterrupt, продолжается с недостающих. Отмена через cancel_event
+# удаляет недописанный результат, как и при последовательной записи.
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+PROCESS_THRESHOLD = 64 * 1024 * 1024  # файлы крупнее 64 МиБ — в отдельные процессы
+MAX_PENDING_PER_WORKER = 4  # сколько заданий на воркер держать в очереди пулов
+SMALL_FILE = 256 * 1024  # файлы до 256 КиБ планировщик объединяет в пачки
+BATCH_BYTES = 8 * 1024 * 1024  # наибольший объём пачки мелких файлов
+BATCH_FILES = 256  # наибольшее число файлов в пачке
+SPLIT_THRESHOLD = 256 * 1024 * 1024  # файлы от 256 МиБ кодируются диапазонами
+RANGE_SIZE = 32 * b64engine.CHUNK_SIZE  # наибольший диапазон — 96 МиБ, кратно 3
+
+# elapsed — время работы над файлом в секундах (без ожидания в очереди);
+# stats — b64stats.FileStats, если замеры включены
+ConvertResult = namedtuple("ConvertResult", "source output size error elapsed stats", defaults=(0.0, None))
+
+# Задача планировщика. kind: "split" — файл кодируется диапазонами ranges
+# (пары смещений), "file" — один файл, "batch" — пачка мелких файлов;
+# jobs — список кортежей (исходный путь, путь результата, размер)
+ScheduledTask = namedtuple("ScheduledTask", "kind jobs ranges", defaults=((),))
+
+# Каналы связи с родителем внутри процесса-воркера (задаются в _init_process_worker)
+_worker_progress = None
+_worker_cancel = None
+
+
+def convert_one(source_path, output_path, on_progress=None, cancel_event=None, use_mmap=None, decode=False,
+                output_format=None, collect_stats=False, profiler=None):
+    """
+    Конвертирует один файл и возвращает ConvertResult.
+    Исключение не пробрасывается, а записывается в поле error —
+    ошибка одного файла не должна прерывать весь пакет.
+
+    :param on_progress: колбэк, получает прирост прочитанных байт
+    :param cancel_event: объект с методом is_set() для отмены
+    :param use_mmap: режим чтения через mmap (см. b64engine.should_mmap)
+    :param decode: декодировать .base64.txt обратно в двоичный файл
+    :param output_format: b64formats.OutputFormat (при декодировании — формат текста);
+        None — стандартный Base64
+    :param collect_stats: замерять стадии (результат в поле stats)
+    :param profiler: b64stats.ThreadProfiler; None — без профилирования
+    """
+    if profiler is not None:
+        return profiler.call(convert_one, source_path, output_path, on_progress, cancel_event, use_mmap, decode,
+                             output_format, collect_stats)
+    report = delta_reporter(on_progress)
+    stats = b64stats.FileStats() if collect_stats else None
+    started = time.perf_counter()
+    try:
+        if decode:
+            b64formats.decode_file(
+                source_path, output_path, output_format or b64formats.PLAIN,
+                on_progress=report,
+                cancel_event=cancel_event,
+                stats=stats,
+            )
+            size = os.path.getsize(source_path)
+        else:
+            size = b64formats.encode_file(
+                source_path, output_path, output_format or b64formats.PLAIN,
+                on_progress=report,
+                cancel_event=cancel_event,
+                use_mmap=use_mmap,
+                stats=stats,
+            )
+        error = None
+    except Exception as e:
+        size, error = 0, e
+    elapsed = time.perf_counter() - started
+    if stats is not None:
+        stats.bytes_in = size
+        stats.finish(elapsed)
+    return ConvertResult(source_path, output_path, size, error, elapsed, stats)
+
+
+def delta_reporter(on_progress):
+    """
+    Кодировщики сообщают нарастающий итог, а пакетные колбэки ждут приросты:
+    возвращает колбэк-переходник (None, если колбэка нет).
+    """
+    if on_progress is None:
+        return None
+    reported = 0
+
+    def report(total):
+        nonlocal reported
+        on_progress(total - reported)
+        reported = total
+
+    return report
+
+
+def convert_batch(jobs, on_progress=None, cancel_event=None, use_mmap=None, decode=False, output_format=None,
+                  collect_stats=False, profiler=None):
+    """
+    Конвертирует пачку мелких файлов одним заданием пула: накладные расходы
+    на задание делятся на все файлы пачки. После отмены оставшиеся файлы
+    пачки не начинаются.
+
+    :param jobs: кортежи (исходный путь, путь результата[, размер])
+    :return: список ConvertResult
+    """
+    results = []
+    for job in jobs:
+        if cancel_event is not None and cancel_event.is_set():
+            break
+        results.append(convert_one(job[0], job[1], on_progress, cancel_event, use_mmap, decode, output_format,
+                                   collect_stats, profiler))
+    return results
+
+
+def encode_range(source_path, part_path, start, end, output_format=None, on_progress=None, cancel_event=None):
+    """
+    Кодирует диапазон [start, end) файла во временный результат, заранее
+    созданный полной длины (см. b64formats.encode_range). Ошибка пробрасывается.
+
+    :param on_progress: колбэк, получает прирост прочитанных байт
+    :return: время работы в секундах
+    """
+    started = time.perf_counter()
+    b64formats.encode_range(source_path, part_path, start, end, output_format or b64formats.PLAIN,
+                            on_progress=delta_reporter(on_progress), cancel_event=cancel_event)
+    return time.perf_counter() - started
+
+
+def _init_process_worker(progress_queue, cancel_event):
+    global _worker_progress, _worker_cancel
+    _worker_progress = progress_queue
+    _worker_cancel = cancel_event
+
+
+def _convert_in_process(source_path, output_path, use_mmap=None, decode=False, output_format=None,
+                        collect_stats=False):
+    return convert_one(source_path, output_path, _worker_progress.put, _worker_cancel, use_mmap, decode,
+                       output_format, collect_stats)
+
+
+def _encode_range_in_process(source_path, part_path, start, end, output_format=None):
+    return encode_range(source_path, part_path, start, end, output_format, _worker_progress.put, _worker_cancel)
+
+
+def file_size(source_path):
+    try:
+        return os.path.getsize(source_path)
+    except OSError:
+        return 0
+
+
+def _forward_process_events(progress_queue, on_progress, cancel_event, process_cancel, stop):
+    """Пересылает прогресс из процессов-воркеров и передаёт им сигнал отмены."""
+    while not stop.is_set():
+        if cancel_event is not None and cancel_event.is_set():
+            process_cancel.set()
+        try:
+            delta = progress_queue.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        if on_progress:
+            on_progress(delta)
+
+
+class _WorkerPools:
+    """
+    Пул потоков и пул процессов для одного пакета. Пул процессов создаётся
+    при первой задаче для него — его запуск дорог; прогресс из процессов
+    пересылается в on_progress, а отмена — в процессы.
+    """
+
+    def __init__(self, workers, on_progress=None, cancel_event=None):
+        self.workers = workers
+        self.on_progress = on_progress
+        self.cancel_event = cancel_event
+        self.threads = ThreadPoolExecutor(max_workers=workers)
+        self.processes = None
+        self._stop_forwarding = threading.Event()
+
+    def submit_thread(self, function, *args):
+        return self.threads.submit(function, *args)
+
+    def submit_process(self, function, *args):
+        if self.processes is None:
+            # multiprocessing загружается только при первой задаче для процессов
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            progress_queue = multiprocessing.Queue()
+            process_cancel = multiprocessing.Event()
+            self.processes = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_process_worker,
+                initargs=(progress_queue, process_cancel),
+            )
+            threading.Thread(
+                target=_forward_process_events,
+                args=(progress_queue, self.on_progress, self.cancel_event, process_cancel, self._stop_forwarding),
+                daemon=True,
+            ).start()
+        return self.processes.submit(function, *args)
+
+    def shutdown(self):
+        self.threads.shutdown(cancel_futures=True)
+        if self.processes:
+            self.processes.shutdown(cancel_futures=True)
+            self._stop_forwarding.set()
+
+
+def _with_queue_wait(result, submitted):
+    if result.stats is not None:
+        result.stats.queue_wait_s = max(0.0, result.stats.started - submitted)
+    return result
+
+
+def convert_many(jobs, workers=None, process_threshold=PROCESS_THRESHOLD, on_progress=None, cancel_event=None,
+                 use_mmap=None, decode=False, output_format=None, recorder=None):
+    """
+    Параллельно конвертирует набор файлов.
+
+    Задания читаются из jobs лениво (например, прямо из b64scan.scan), поэтому
+    конвертация начинается до окончания обхода директории. В работе держится
+    не больше MAX_PENDING_PER_WORKER заданий на воркер.
+
+    :param jobs: итерируемое кортежей (исходный путь, путь результата[, размер])
+    :param workers: число воркеров (по умолчанию — число ядер)
+    :param process_threshold: размер в байтах, начиная с которого файл
+        кодируется в пуле процессов; None — только потоки
+    :param on_progress: колбэк, получает прирост прочитанных байт;
+        может вызываться из разных потоков
+    :param cancel_event: объект с методом is_set(); после установки новые
+        задания не берутся, а начатые прерываются на границе блока
+    :param use_mmap: режим чтения через mmap (см. b64engine.should_mmap)
+    :param decode: декодировать вместо кодирования
+    :param output_format: b64formats.OutputFormat; None — стандартный Base64
+    :param recorder: b64stats.RunRecorder — включает замеры стадий, времени
+        ожидания в очереди и профилирование; результаты в него заносит вызывающий
+    :return: генератор ConvertResult в порядке завершения
+    """
+    workers = max(1, workers or DEFAULT_WORKERS)
+    collect_stats = recorder is not None
+    profiler = recorder.profiler if recorder is not None else None
+
+    if workers == 1:
+        for job in jobs:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            yield convert_one(job[0], job[1], on_progress, cancel_event, use_mmap, decode, output_format,
+                              collect_stats, profiler)
+        return
+
+    pools = _WorkerPools(workers, on_progress, cancel_event)
+    pending = {}
+
+    def collect(return_when):
+        done, _ = wait(pending, return_when=return_when)
+        for future in done:
+            source_path, output_path, submitted = pending.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                # Сбой самого воркера (например, аварийно завершённый процесс)
+                yield ConvertResult(source_path, output_path, 0, e)
+                continue
+            yield _with_queue_wait(result, submitted)
+
+    try:
+        for job in jobs:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            source_path, output_path = job[0], job[1]
+            size = job[2] if len(job) > 2 else file_size(source_path)
+            if process_threshold is not None and size >= process_threshold:
+                future = pools.submit_process(_convert_in_process, source_path, output_path, use_mmap, decode,
+                                              output_format, collect_stats)
+            else:
+                future = pools.submit_thread(convert_one, source_path, output_path, on_progress, cancel_event,
+                                             use_mmap, decode, output_format, collect_stats, profiler)
+            pending[future] = (source_path, output_path, time.perf_counter())
+            if len(pending) >= workers * MAX_PENDING_PER_WORKER:
+                yield from collect(FIRST_COMPLETED)
+        while pending:
+            yield from collect(FIRST_COMPLETED)
+    finally:
+        pools.shutdown()
+
+
+# === Планирование по размерам ===
+
+def split_ranges(size, workers, range_size=RANGE_SIZE):
+    """
+    Делит size байт на диапазоны, кратные блоку кодирования (а значит, и 3 байтам):
+    не длиннее range_size и не меньше, чем по одному на воркер.
+
+    :return: список пар (начало, конец)
+    """
+    step = min(range_size, -(-size // workers))
+    step = -(-step // b64engine.CHUNK_SIZE) * b64engine.CHUNK_SIZE
+    return [(start, min(start + step, size)) for start in range(0, size, step)]
+
+
+def plan_tasks(jobs, workers, split=True, small_file=SMALL_FILE, split_threshold=SPLIT_THRESHOLD,
+               range_size=RANGE_SIZE):
+    """
+    Раскладывает задания на задачи пула от крупных к мелким (дожидается всего списка).
+    Мелкие файлы собираются в пачки, причём пачек не меньше, чем воркеров, —
+    иначе хвост из мелких файлов достался бы одному воркеру.
+
+    :param jobs: итерируемое кортежей (исходный путь, путь результата[, размер])
+    :param split: делить ли файлы от split_threshold на диапазоны
+    :return: список ScheduledTask
+    """
+    sized = [(job[0], job[1], job[2] if len(job) > 2 else file_size(job[0])) for job in jobs]
+    sized.sort(key=lambda job: job[2], reverse=True)
+    tasks = []
+    small = []
+    for job in sized:
+        if job[2] <= small_file:
+            small.append(job)
+        elif split and workers > 1 and job[2] >= split_threshold:
+            tasks.append(ScheduledTask("split", [job], split_ranges(job[2], workers, range_size)))
+        else:
+            tasks.append(ScheduledTask("file", [job]))
+    if small:
+        limit = max(1, min(BATCH_BYTES, sum(job[2] for job in small) // workers))
+        batch, batch_bytes = [], 0
+        for job in small:
+            if batch and (batch_bytes + job[2] > limit or len(batch) >= BATCH_FILES):
+                tasks.append(ScheduledTask("batch", batch))
+                batch, batch_bytes = [], 0
+            batch.append(job)
+            batch_bytes += job[2]
+        tasks.append(ScheduledTask("batch", batch))
+    return tasks
+
+
+class _SplitFile:
+    """
+    Файл, кодируемый диапазонами: результат ставится на место, когда готовы все.
+    Если от прерванного запуска осталась точка с готовыми диапазонами, кодируются
+    только недостающие (todo), причём по разбиению из точки.
+    """
+
+    def __init__(self, job, ranges):
+        source_path, output_path, size = job
+        self.job = job
+        self.length = b64engine.encoded_length(size)
+        self.state = b64engine.source_state(source_path, b64engine.CHECKPOINT_RANGES)
+        self.ranges, self.completed = self._load_checkpoint(output_path, source_path)
+        if self.ranges is not None:
+            self.output = b64engine.open_output(output_path, resume_length=self.length)
+        else:
+            self.ranges, self.completed = list(ranges), []
+            self.output = b64engine.open_output(output_path, length=self.length)
+        completed = set(self.completed)
+        self.todo = [rng for rng in self.ranges if rng not in completed]
+        self.resumed = sum(end - start for start, end in self.completed)
+        self.submitted = 0
+        self.running = {}  # future -> диапазон
+        self.elapsed = 0.0
+        self.error = None
+
+    def _load_checkpoint(self, output_path, source_path):
+        """:return: (разбиение, готовые диапазоны) из точки или (None, None)"""
+        checkpoint = b64engine.load_checkpoint(output_path, source_path, b64engine.CHECKPOINT_RANGES)
+        if checkpoint is None or checkpoint.get("output_length") != self.length:
+            return None, None
+        try:
+            ranges = [(int(start), int(end)) for start, end in checkpoint["ranges"]]
+            completed = [(int(start), int(end)) for start, end in checkpoint["completed"]]
+        except (KeyError, TypeError, ValueError):
+            return None, None
+        # Разбиение должно покрывать файл целиком, иначе точка от другого запуска
+        if [rng[0] for rng in ranges] != [0] + [rng[1] for rng in ranges[:-1]] or ranges[-1][1] != self.job[2]:
+            return None, None
+        if not set(completed) <= set(ranges):
+            return None, None
+        return ranges, completed
+
+    @property
+    def finished(self):
+        return not self.running and (self.error is not None or self.submitted == len(self.todo))
+
+    def range_done(self, future):
+        """Учитывает завершённый диапазон и сохраняет точку с готовыми диапазонами."""
+        rng = self.running.pop(future)
+        try:
+            self.elapsed += future.result()
+        except Exception as e:
+            self.error = self.error or e
+            return
+        if self.error is not None:
+            return
+        self.completed.append(rng)
+        try:
+            # Диапазоны пишут воркеры через свои дескрипторы; fsync сбрасывает весь файл
+            self.output.checkpoint(dict(self.state, ranges=self.ranges, completed=self.completed,
+                                        output_length=self.length))
+        except OSError as e:
+            self.error = e
+
+    def finish(self, collect_stats):
+        source_path, output_path, size = self.job
+        if self.error is None:
+            try:
+                # Диапазоны рассчитаны по размеру на момент обхода
+                if os.path.getsize(source_path) != size:
+                    raise OSError(f"Файл изменился во время конвертации: {source_path}")
+                self.output.commit()
+            except OSError as e:
+                self.error = e
+        if self.error is not None:
+            self.output.discard()
+            return ConvertResult(source_path, output_path, 0, self.error, self.elapsed)
+        stats = None
+        if collect_stats:
+            # Диапазоны читаются через mmap внутри кодирования — стадии не разделяются
+            stats = b64stats.FileStats()
+            stats.bytes_in = size
+            stats.bytes_out = b64engine.encoded_length(size)
+            stats.worker = "split"
+            stats.finish(self.elapsed)
+        return ConvertResult(source_path, output_path, size, None, self.elapsed, stats)
+
+
+def convert_scheduled(jobs, workers=None, process_threshold=PROCESS_THRESHOLD, on_progress=None, cancel_event=None,
+                      use_mmap=None, decode=False, output_format=None, recorder=None, small_file=SMALL_FILE,
+                      split_threshold=SPLIT_THRESHOLD, range_size=RANGE_SIZE):
+    """
+    Как convert_many, но с планированием по размерам (plan_tasks). Общее время
+    определяется объёмом данных, делённым на число воркеров, а не самым крупным
+    файлом. Конвертация начинается после окончания обхода директории.
+
+    Диапазонами кодируются только форматы без переносов строк, префикса и сжатия
+    (b64formats.splittable) и только при кодировании. Диапазоны кодируются
+    в пуле процессов (с process_threshold=None — в потоках); у разделённого
+    файла elapsed — суммарное время диапазонов, а stats — без разбивки по стадиям.
+
+    Готовые диапазоны сохраняются в контрольной точке: после завершения процесса
+    или KeyboardInterrupt следующий запуск кодирует только недостающие. Отмена
+    через cancel_event и ошибки удаляют недописанный результат. Файл с точкой
+    последовательной записи (b64engine.encode_file) не делится, а продолжается с неё.
+
+    Параметры те же, что у convert_many; small_file, split_threshold и range_size —
+    пороги планировщика (см. plan_tasks и split_ranges).
+    :return: генератор ConvertResult в порядке завершения
+    """
+    workers = max(1, workers or DEFAULT_WORKERS)
+    output_format = output_format or b64formats.PLAIN
+    split = not decode and b64formats.splittable(output_format)
+    tasks = plan_tasks(jobs, workers, split, small_file, split_threshold, range_size)
+    if workers == 1:
+        yield from convert_many((job for task in tasks for job in task.jobs), 1, process_threshold, on_progress,
+                                cancel_event, use_mmap, decode, output_format, recorder)
+        return
+
+    collect_stats = recorder is not None
+    profiler = recorder.profiler if recorder is not None else None
+    pools = _WorkerPools(workers, on_progress, cancel_event)
+    pending = {}
+    splits = []
+
+    def cancelled():
+        return cancel_event is not None and cancel_event.is_set()
+
+    def collect(return_when):
+        done, _ = wait(pending, return_when=return_when)
+        for future in done:
+            task, split_file, submitted = pending.pop(future)
+            if split_file is not None:
+                split_file.range_done(future)
+                if split_file.finished:
+                    splits.remove(split_file)
+                    yield split_file.finish(collect_stats)
+                continue
+            try:
+                results = future.result()
+            except Exception as e:
+                # Сбой самого воркера (например, аварийно завершённый процесс)
+                results = [ConvertResult(job[0], job[1], 0, e) for job in task.jobs]
+            if task.kind != "batch":
+                results = [results]
+            for result in results:
+                yield _with_queue_wait(result, submitted)
+
+    def add(future, task, split_file=None):
+        pending[future] = (task, split_file, time.perf_counter())
+        if len(pending) >= workers * MAX_PENDING_PER_WORKER:
+            return collect(FIRST_COMPLETED)
+        return ()
+
+    interrupted = False
+    try:
+        for task in tasks:
+            if cancelled():
+                break
+            if task.kind == "batch":
+                future = pools.submit_thread(convert_batch, task.jobs, on_progress, cancel_event, use_mmap, decode,
+                                             output_format, collect_stats, profiler)
+                yield from add(future, task)
+                continue
+            source_path, output_path, size = task.jobs[0]
+            # Прерванная последовательная запись продолжается с контрольной точки,
+            # а не начинается заново диапазонами
+            if task.kind == "file" or (output_format == b64formats.PLAIN
+                                       and b64engine.load_checkpoint(output_path, source_path) is not None):
+                if process_threshold is not None and size >= process_threshold:
+                    future = pools.submit_process(_convert_in_process, source_path, output_path, use_mmap, decode,
+                                                  output_format, collect_stats)
+                else:
+                    future = pools.submit_thread(convert_one, source_path, output_path, on_progress, cancel_event,
+                                                 use_mmap, decode, output_format, collect_stats, profiler)
+                yield from add(future, task)
+                continue
+            try:
+                split_file = _SplitFile(task.jobs[0], task.ranges)
+            except OSError as e:
+                yield ConvertResult(source_path, output_path, 0, e)
+                continue
+            splits.append(split_file)
+            if split_file.resumed and on_progress:
+                on_progress(split_file.resumed)
+            for start, end in split_file.todo:
+                if cancelled() or split_file.error is not None:
+                    break
+                args = (source_path, split_file.output.part_path, start, end, output_format)
+                if process_threshold is not None:
+                    future = pools.submit_process(_encode_range_in_process, *args)
+                else:
+                    future = pools.submit_thread(encode_range, *args, on_progress, cancel_event)
+                split_file.submitted += 1
+                split_file.running[future] = (start, end)
+                yield from add(future, task, split_file)
+            if split_file.submitted < len(split_file.todo) and split_file.error is None:
+                split_file.error = b64engine.ConversionCancelled()
+            if split_file.finished and split_file in splits:
+                splits.remove(split_file)
+                yield split_file.finish(collect_stats)
+        while pending:
+            yield from collect(FIRST_COMPLETED)
+    except (KeyboardInterrupt, SystemExit, GeneratorExit):
+        interrupted = True
+        raise
+    finally:
+        pools.shutdown()
+        # Недособранные результаты (воркеры уже остановлены): при прерывании
+        # остаются с точкой для продолжения, при отмене и ошибках удаляются
+        for split_file in splits:
+            if interrupted and split_file.completed and split_file.error is None and not cancelled():
+                split_file.output.keep()
+            else:
+                split_file.output.discard()
+
+
+# Порядок обработки для пакетной конвертации: "stream" — в порядке обхода,
+# начиная до его окончания; "size" — после обхода, по размерам (convert_scheduled)
+SCHEDULES = {
+    "stream": convert_many,
+    "size": convert_scheduled,
+}
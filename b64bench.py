@@ -0,0 +1,292 @@
+import os
+import sys
+import json
+import time
+import base64
+import random
+import argparse
+import platform
+import tempfile
+import subprocess
+
+import b64engine
+import b64batch
+
+# === Бенчмарк пропускной способности и памяти ===
+# Генерирует синтетические наборы файлов и прогоняет на них каждый режим
+# конвертации. Каждый прогон идёт в отдельном процессе, чтобы пиковый RSS
+# одного режима не смешивался с другими. Отчёт — JSON в stdout или файл.
+#
+#   python b64bench.py --scale 0.1 --output bench.json
+#   python b64bench.py --startup          — время запуска (импорт, первое окно)
+
+MIB = 1024 * 1024
+
+# Наборы файлов: (число файлов, минимальный размер, максимальный размер) при scale=1
+CORPORA = {
+    "tiny": (2000, 4 * 1024, 4 * 1024),
+    "huge": (2, 256 * MIB, 256 * MIB),
+    "mixed": (200, 1024, 16 * MIB),
+}
+MODES = ("whole-file", "streaming", "mmap", "parallel")
+
+# Замеры запуска: код, выполняемый в чистом интерпретаторе
+STARTUP_TARGETS = {
+    "interpreter": "pass",
+    "import-cli": "import b64cli",
+    "import-api": "import b64api",
+    "import-gui": "import ConverterToB64",
+    # До первого отрисованного окна: mainloop подменяется одним update()
+    "first-window": (
+        "import tkinter\n"
+        "tkinter.Tk.mainloop = lambda self, n=0: (self.update(), self.destroy())\n"
+        "import ConverterToB64\n"
+        "ConverterToB64.create_ask_window()"
+    ),
+}
+
+
+def generate_corpus(directory, name, scale=1.0, seed=0):
+    """
+    Создаёт набор файлов в directory. Размеры в наборе mixed распределены
+    логарифмически равномерно. Содержимое детерминировано (seed).
+    scale уменьшает число файлов, а для набора huge — их размер.
+    """
+    count, min_size, max_size = CORPORA[name]
+    if name == "huge":
+        # Крупные файлы масштабируем по размеру, остальные наборы — по числу файлов
+        min_size = max_size = max(1, int(max_size * scale))
+    else:
+        count = max(1, int(count * scale))
+    rng = random.Random(f"{name}-{seed}")
+    os.makedirs(directory, exist_ok=True)
+    for i in range(count):
+        if min_size == max_size:
+            size = min_size
+        else:
+            size = int(min_size * (max_size / min_size) ** rng.random())
+        with open(os.path.join(directory, f"{name}-{i:05d}.bin"), "wb") as f:
+            remaining = size
+            while remaining:
+                n = min(remaining, 4 * MIB)
+                f.write(rng.randbytes(n))
+                remaining -= n
+    return directory
+
+
+def peak_rss_bytes():
+    """Пиковый RSS текущего процесса и его дочерних процессов (если доступно)."""
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    if resource is not None:
+        # ru_maxrss: Linux — КиБ, macOS — байты
+        factor = 1 if sys.platform == "darwin" else 1024
+        own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        return max(own, children) * factor
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return counters.PeakWorkingSetSize
+    return None
+
+
+def percentile(values, q):
+    """Перцентиль методом ближайшего ранга; q — от 0 до 100."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+def _whole_file(source_path, output_path):
+    """Исходный способ: файл целиком в память, затем b64encode."""
+    started = time.perf_counter()
+    try:
+        with open(source_path, "rb") as f:
+            file_data = f.read()
+        base64_string = base64.b64encode(file_data).decode("utf-8")
+        with open(output_path, "w", encoding="utf-8") as output_file:
+            output_file.write(base64_string)
+        return b64batch.ConvertResult(source_path, output_path, len(file_data), None,
+                                      time.perf_counter() - started)
+    except Exception as e:
+        return b64batch.ConvertResult(source_path, output_path, 0, e, time.perf_counter() - started)
+
+
+def run_mode(mode, corpus_dir, output_dir, workers=None):
+    """Прогоняет один режим на наборе и возвращает словарь с метриками."""
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = [
+        (os.path.join(corpus_dir, f), b64engine.build_output_path(f, output_dir))
+        for f in sorted(os.listdir(corpus_dir))
+    ]
+    started = time.perf_counter()
+    if mode == "whole-file":
+        results = [_whole_file(*job) for job in jobs]
+    elif mode == "streaming":
+        results = list(b64batch.convert_many(jobs, workers=1, use_mmap=False))
+    elif mode == "mmap":
+        results = list(b64batch.convert_many(jobs, workers=1, use_mmap=True))
+    elif mode == "parallel":
+        results = list(b64batch.convert_many(jobs, workers=workers))
+    else:
+        raise ValueError(f"Неизвестный режим: {mode}")
+    seconds = time.perf_counter() - started
+
+    total_bytes = sum(r.size for r in results)
+    latencies = [round(r.elapsed * 1000, 3) for r in results if r.error is None]
+    return {
+        "mode": mode,
+        "workers": (workers or b64batch.DEFAULT_WORKERS) if mode == "parallel" else 1,
+        "files": len(results),
+        "bytes": total_bytes,
+        "errors": sum(1 for r in results if r.error is not None),
+        "seconds": round(seconds, 6),
+        "mb_per_s": round(total_bytes / MIB / seconds, 3) if seconds else None,
+        "files_per_s": round(len(results) / seconds, 3) if seconds else None,
+        "peak_rss_bytes": peak_rss_bytes(),
+        "latency_p50_ms": percentile(latencies, 50),
+        "latency_p99_ms": percentile(latencies, 99),
+    }
+
+
+def run_isolated(mode, corpus_dir, output_dir, workers=None):
+    """Запускает run_mode в отдельном процессе, чтобы измерить его собственный пик RSS."""
+    command = [sys.executable, os.path.abspath(__file__), "--child", mode, corpus_dir, output_dir]
+    if workers:
+        command += ["--workers", str(workers)]
+    completed = subprocess.run(command, capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout)
+
+
+def measure_startup(targets=tuple(STARTUP_TARGETS), repeat=5):
+    """
+    Время запуска в новых процессах: интерпретатор + импорт (и первое окно).
+    Для каждого варианта — минимум и медиана по repeat запускам; модули
+    берутся из каталога бенчмарка, кэш байт-кода прогревается первым запуском.
+
+    :return: список словарей с метриками
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    results = []
+    for name in targets:
+        command = [sys.executable, "-c", STARTUP_TARGETS[name]]
+        timings = []
+        error = None
+        for attempt in range(repeat + 1):
+            started = time.perf_counter()
+            completed = subprocess.run(command, cwd=here, capture_output=True, text=True)
+            elapsed = time.perf_counter() - started
+            if completed.returncode != 0:
+                error = completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "ошибка"
+                break
+            if attempt:
+                timings.append(elapsed * 1000)
+        results.append({
+            "target": name,
+            "runs": len(timings),
+            "min_ms": round(min(timings), 3) if timings else None,
+            "median_ms": round(percentile(timings, 50), 3) if timings else None,
+            "error": error,
+        })
+        if error:
+            print(f"{name:13} ошибка: {error}", file=sys.stderr)
+        else:
+            print(f"{name:13} {results[-1]['median_ms']} мс", file=sys.stderr)
+    return results
+
+
+def run_suite(corpora=tuple(CORPORA), modes=MODES, scale=1.0, workers=None, work_dir=None):
+    """Генерирует наборы и прогоняет все режимы; возвращает отчёт (словарь)."""
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "scale": scale,
+        "results": [],
+    }
+    with tempfile.TemporaryDirectory(prefix="b64bench-", dir=work_dir) as root:
+        for corpus in corpora:
+            corpus_dir = generate_corpus(os.path.join(root, corpus), corpus, scale)
+            for mode in modes:
+                output_dir = os.path.join(root, f"out-{corpus}-{mode}")
+                result = run_isolated(mode, corpus_dir, output_dir, workers)
+                result["corpus"] = corpus
+                report["results"].append(result)
+                print(f"{corpus:6} {mode:10} {result['mb_per_s']} MB/s, "
+                      f"{result['files_per_s']} файл/с", file=sys.stderr)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="b64bench", description="Бенчмарк конвертации в Base64")
+    parser.add_argument("--corpus", action="append", choices=sorted(CORPORA),
+                        help="наборы файлов (по умолчанию — все)")
+    parser.add_argument("--mode", action="append", choices=MODES,
+                        help="режимы конвертации (по умолчанию — все)")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="множитель размера наборов (например: 0.1 для быстрого прогона)")
+    parser.add_argument("-j", "--workers", type=int, help="число воркеров в режиме parallel")
+    parser.add_argument("--work-dir", help="где создавать временные файлы")
+    parser.add_argument("--output", help="файл для JSON-отчёта (по умолчанию — stdout)")
+    parser.add_argument("--startup", action="store_true",
+                        help="измерить время запуска (импорт модулей, первое окно) вместо конвертации")
+    parser.add_argument("--repeat", type=int, default=5, help="число запусков на вариант в --startup")
+    parser.add_argument("--child", nargs=3, metavar=("MODE", "CORPUS_DIR", "OUTPUT_DIR"),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run_mode(*args.child, workers=args.workers)))
+        return 0
+
+    if args.startup:
+        report = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "startup": measure_startup(repeat=args.repeat),
+        }
+    else:
+        report = run_suite(
+            corpora=args.corpus or tuple(CORPORA),
+            modes=args.mode or MODES,
+            scale=args.scale,
+            workers=args.workers,
+            work_dir=args.work_dir,
+        )
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()
+    sys.exit(main())
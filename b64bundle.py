@@ -0,0 +1,147 @@
+import os
+import json
+import datetime
+from collections import namedtuple
+
+import b64engine
+
+# === Контейнер: много файлов в одном Base64-файле ===
+# Формат (.b64bundle.txt):
+#   B64BUNDLE 1\n
+#   {"entries": [{"name": ..., "size": ..., "offset": ..., "length": ...}, ...]}\n
+#   <Base64 первого файла><Base64 второго файла>...
+# Каждый файл кодируется отдельно (со своим паддингом), поэтому длина его
+# текста известна заранее по размеру: индекс пишется в заголовок до данных.
+# offset отсчитывается от начала данных (после строки индекса), так что
+# любую запись можно найти и декодировать, не читая остальной контейнер.
+
+BUNDLE_MAGIC = b"B64BUNDLE 1\n"
+BUNDLE_SUFFIX = b64engine.BUNDLE_SUFFIX
+
+BundleEntry = namedtuple("BundleEntry", "name size offset length")
+
+
+class BundleError(ValueError):
+    """Повреждённый контейнер или ошибка при его сборке."""
+
+
+def build_bundle_path(source_dir, save_dir=None):
+    """Путь контейнера в формате <имя директории>-<ГГГГ-ММ-ДД>.b64bundle.txt."""
+    save_dir = save_dir or source_dir
+    name = os.path.basename(os.path.normpath(source_dir)) or "bundle"
+    return os.path.join(save_dir, f"{name}-{datetime.date.today()}{BUNDLE_SUFFIX}")
+
+
+def build_index(entries):
+    """
+    Строит индекс контейнера.
+
+    :param entries: последовательность (исходный путь, имя в контейнере, размер)
+    :return: список BundleEntry
+    """
+    index = []
+    names = set()
+    offset = 0
+    for _, name, size in entries:
+        if name in names:
+            raise BundleError(f"Имя повторяется в контейнере: {name}")
+        names.add(name)
+        length = b64engine.encoded_length(size)
+        index.append(BundleEntry(name, size, offset, length))
+        offset += length
+    return index
+
+
+def write_bundle(entries, output_path, on_progress=None, cancel_event=None):
+    """
+    Записывает файлы в один контейнер потоково.
+    Если файл изменил размер после построения индекса, контейнер не создаётся.
+
+    :param entries: последовательность (исходный путь, имя в контейнере, размер)
+    :param on_progress: колбэк, получает общее число прочитанных байт
+    :param cancel_event: объект с методом is_set() для отмены
+    :return: список BundleEntry
+    """
+    entries = list(entries)
+    index = build_index(entries)
+    header = json.dumps({"entries": [entry._asdict() for entry in index]}, ensure_ascii=False)
+    done = 0
+    # Контейнер пишется во временный файл и появляется целиком (см. b64engine.AtomicOutput)
+    with b64engine.open_output(output_path) as dst:
+        dst.write(BUNDLE_MAGIC)
+        dst.write(header.encode("utf-8") + b"\n")
+        for (source_path, _, size), entry in zip(entries, index):
+            with open(source_path, "rb") as src:
+                # Длина текста в индексе рассчитана по размеру при обходе: выросший
+                # файл иначе был бы молча обрезан
+                if os.fstat(src.fileno()).st_size != size:
+                    raise BundleError(f"Файл изменился во время упаковки: {source_path}")
+                n = b64engine.encode_stream(
+                    b64engine.LimitedReader(src, size), dst,
+                    chunk_size=min(b64engine.CHUNK_SIZE, size + 3),
+                    on_progress=(lambda total, base=done: on_progress(base + total)) if on_progress else None,
+                    cancel_event=cancel_event,
+                )
+            if n != size:
+                raise BundleError(f"Файл изменился во время упаковки: {source_path}")
+            done += size
+    return index
+
+
+def read_index(bundle):
+    """
+    Читает индекс открытого контейнера (бинарный режим).
+
+    :return: (список BundleEntry, смещение начала данных)
+    """
+    if bundle.readline() != BUNDLE_MAGIC:
+        raise BundleError("Это не контейнер B64BUNDLE")
+    try:
+        data = json.loads(bundle.readline())
+        index = [BundleEntry(**entry) for entry in data["entries"]]
+    except (ValueError, KeyError, TypeError) as e:
+        raise BundleError(f"Повреждён индекс контейнера: {e}") from e
+    return index, bundle.tell()
+
+
+def list_bundle(bundle_path):
+    with open(bundle_path, "rb") as bundle:
+        return read_index(bundle)[0]
+
+
+def extract_entry(bundle, entry, data_start, dst):
+    """Декодирует одну запись открытого контейнера в поток dst, читая только её данные."""
+    bundle.seek(data_start + entry.offset)
+    written = b64engine.decode_stream(b64engine.LimitedReader(bundle, entry.length), dst)
+    if written != entry.size:
+        raise BundleError(f"Запись {entry.name} усечена: {written} из {entry.size} байт")
+    return written
+
+
+def extract_bundle(bundle_path, output_dir, names=None):
+    """
+    Распаковывает записи контейнера в output_dir, сохраняя относительные пути.
+
+    :param names: имена записей; None — все
+    :return: список путей распакованных файлов
+    """
+    extracted = []
+    with open(bundle_path, "rb") as bundle:
+        index, data_start = read_index(bundle)
+        if names is not None:
+            wanted = set(names)
+            missing = wanted - {entry.name for entry in index}
+            if missing:
+                raise BundleError(f"Нет записей в контейнере: {', '.join(sorted(missing))}")
+            index = [entry for entry in index if entry.name in wanted]
+        root = os.path.abspath(output_dir)
+        for entry in index:
+            target = os.path.abspath(os.path.join(root, *entry.name.split("/")))
+            # Имена из чужого контейнера не должны выводить за пределы output_dir
+            if os.path.commonpath([root, target]) != root:
+                raise BundleError(f"Недопустимое имя записи: {entry.name}")
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with b64engine.open_output(target) as dst:
+                extract_entry(bundle, entry, data_start, dst)
+            extracted.append(target)
+    return extracted
@@ -0,0 +1,176 @@
+import os
+import json
+import hashlib
+import threading
+
+import b64engine
+
+# === Инкрементальная конвертация ===
+# В каталоге сохранения хранится манифест .b64manifest.json: для каждого
+# исходного файла — размер, mtime, (необязательно) SHA-256, путь результата
+# и формат вывода. Если размер и mtime не изменились, результат на месте
+# и записан в том же формате — файл пропускается без чтения, за время одного stat().
+
+MANIFEST_NAME = b64engine.MANIFEST_NAME
+MANIFEST_VERSION = 1
+
+
+def hash_file(file_path, chunk_size=b64engine.CHUNK_SIZE):
+    """Потоково считает SHA-256 файла."""
+    digest = hashlib.sha256()
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(file_path, "rb") as f:
+        while True:
+            n = f.readinto(view)
+            if not n:
+                break
+            digest.update(view[:n])
+    return digest.hexdigest()
+
+
+class Manifest:
+    """Манифест одного каталога сохранения."""
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, MANIFEST_NAME)
+        self.entries = {}
+        self.changed = False
+
+    @classmethod
+    def load(cls, directory):
+        manifest = cls(directory)
+        try:
+            with open(manifest.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                manifest.entries = data.get("entries", {})
+        except (OSError, ValueError):
+            # Нет манифеста или он повреждён — начинаем с чистого листа
+            pass
+        return manifest
+
+    def evict_missing(self):
+        """Удаляет записи, исходные файлы которых больше не существуют."""
+        missing = [source for source in self.entries if not os.path.exists(source)]
+        for source in missing:
+            del self.entries[source]
+        if missing:
+            self.changed = True
+        return len(missing)
+
+    def save(self):
+        if not self.changed:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "entries": self.entries}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+        self.changed = False
+
+
+class IncrementalCache:
+    """
+    Пропускает неизменённые файлы при повторной конвертации.
+    Манифест ведётся отдельно для каждого каталога, куда пишутся результаты.
+    """
+
+    def __init__(self, use_hash=False, force=False, output_format=None):
+        """
+        :param use_hash: сверять SHA-256, если размер совпал, а mtime — нет
+            (например, файл скопирован заново без изменений)
+        :param force: конвертировать всё заново, но обновить манифест
+        :param output_format: b64formats.OutputFormat этого запуска (None при декодировании);
+            результаты в другом формате считаются устаревшими
+        """
+        self.use_hash = use_hash
+        self.force = force
+        # Приводим к виду после чтения из JSON (кортеж — список), чтобы сравнение было точным
+        self.output_format = json.loads(json.dumps(output_format))
+        self.manifests = {}
+        self.skipped = []
+        self._pending = {}
+        # select() может работать в фоновом потоке одновременно с record()
+        self._lock = threading.RLock()
+
+    def _manifest_for(self, output_path):
+        directory = os.path.dirname(os.path.abspath(output_path))
+        with self._lock:
+            manifest = self.manifests.get(directory)
+            if manifest is None:
+                manifest = self.manifests[directory] = Manifest.load(directory)
+            return manifest
+
+    def _is_fresh(self, manifest, source, st):
+        entry = manifest.entries.get(source)
+        if entry is None or entry["size"] != st.st_size:
+            return False
+        # Записи без формата (старые манифесты) тоже считаются устаревшими
+        if entry.get("format", False) != self.output_format:
+            return False
+        if not os.path.exists(entry["output"]):
+            return False
+        if entry["mtime_ns"] == st.st_mtime_ns:
+            return True
+        if self.use_hash and entry.get("sha256"):
+            digest = hash_file(source)
+            self._pending[source] = (st, digest)
+            if digest == entry["sha256"]:
+                entry["mtime_ns"] = st.st_mtime_ns
+                manifest.changed = True
+                return True
+        return False
+
+    def select(self, jobs):
+        """
+        Лениво отбирает задания, требующие конвертации. Пропущенные файлы
+        накапливаются в self.skipped парами (источник, ранее записанный результат).
+
+        :param jobs: итерируемое кортежей (исходный путь, путь результата[, размер])
+        """
+        for job in jobs:
+            source_path, output_path = job[0], job[1]
+            source = os.path.abspath(source_path)
+            manifest = self._manifest_for(output_path)
+            try:
+                st = os.stat(source)
+            except OSError:
+                yield job
+                continue
+            with self._lock:
+                if not self.force and self._is_fresh(manifest, source, st):
+                    self.skipped.append((source_path, manifest.entries[source]["output"]))
+                    continue
+                self._pending.setdefault(source, (st, None))
+            yield job
+
+    def record(self, result):
+        """Заносит в манифест успешно сконвертированный файл (ConvertResult)."""
+        if result.error is not None:
+            return
+        source = os.path.abspath(result.source)
+        # stat берём на момент планирования: если файл менялся во время
+        # конвертации, следующий запуск увидит другой mtime и перекодирует его
+        with self._lock:
+            st, digest = self._pending.pop(source, (None, None))
+        if st is None:
+            st = os.stat(source)
+        entry = {
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "output": os.path.abspath(result.output),
+            "format": self.output_format,
+        }
+        if self.use_hash:
+            entry["sha256"] = digest or hash_file(source)
+        manifest = self._manifest_for(result.output)
+        with self._lock:
+            manifest.entries[source] = entry
+            manifest.changed = True
+
+    def save(self):
+        """Вычищает записи удалённых источников и сохраняет манифесты."""
+        with self._lock:
+            for manifest in self.manifests.values():
+                manifest.evict_missing()
+                manifest.save()
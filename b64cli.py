@@ -0,0 +1,431 @@
+import os
+import sys
+import argparse
+import functools
+
+import b64api
+import b64engine
+import b64batch
+import b64cache
+import b64formats
+import b64scan
+import b64stats
+import b64bundle
+import b64dedup
+import b64journal
+import b64verify
+
+# === Консольный интерфейс ===
+# Работает без дисплея: tkinter, pyperclip и win32clipboard не импортируются.
+# Графический интерфейс загружается только при запуске без аргументов (или с --gui).
+
+
+MMAP_MODES = {"auto": None, "always": True, "never": False}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="b64cli",
+        description="Конвертация файлов в Base64 (.base64.txt) и обратно. "
+                    "Без аргументов открывает графический интерфейс.",
+    )
+    parser.add_argument(
+        "inputs", nargs="*",
+        help="файлы или директории; '-' — читать stdin и писать результат в stdout",
+    )
+    parser.add_argument(
+        "-d", "--decode", action="store_true",
+        help="декодировать .base64.txt обратно в исходные файлы "
+             "(формат текста задаётся теми же ключами, что и при кодировании)",
+    )
+    parser.add_argument(
+        "--verify", action="store_true",
+        help="не конвертировать, а сверить готовые .base64.txt с исходными файлами "
+             "(формат задаётся теми же ключами, что и при кодировании); код возврата 1 "
+             "при расхождениях, усечённых и отсутствующих результатах",
+    )
+    parser.add_argument(
+        "--restore-ext",
+        help="при декодировании добавить восстановленным файлам это расширение "
+             "(в имени .base64.txt оно не сохраняется)",
+    )
+    parser.add_argument(
+        "-e", "--ext", action="append",
+        help="обрабатывать в директориях только файлы с этим расширением (например: pdf); "
+             "можно указать несколько раз или через запятую",
+    )
+    parser.add_argument(
+        "--include", action="append", metavar="GLOB",
+        help="обрабатывать только файлы, подходящие под шаблон (имя или относительный путь)",
+    )
+    parser.add_argument(
+        "--exclude", action="append", metavar="GLOB",
+        help="пропускать файлы и поддиректории, подходящие под шаблон",
+    )
+    parser.add_argument(
+        "-r", "--recursive", action="store_true",
+        help="обходить директории рекурсивно",
+    )
+    parser.add_argument(
+        "-o", "--output-dir",
+        help="куда сохранять результаты (по умолчанию — рядом с исходными файлами)",
+    )
+    parser.add_argument(
+        "-j", "--workers", type=int, default=b64batch.DEFAULT_WORKERS,
+        help="число параллельных воркеров (по умолчанию: %(default)s)",
+    )
+    parser.add_argument(
+        "--bundle", metavar="PATH",
+        help=f"упаковать все входные файлы в один контейнер (*{b64bundle.BUNDLE_SUFFIX}) с оглавлением",
+    )
+    parser.add_argument(
+        "--extract", action="store_true",
+        help="распаковать контейнеры, переданные во входных путях (в --output-dir или текущую директорию)",
+    )
+    parser.add_argument(
+        "--entry", action="append", metavar="NAME",
+        help="при распаковке — только эта запись контейнера (можно указать несколько раз)",
+    )
+    parser.add_argument(
+        "--list", action="store_true",
+        help="показать оглавление контейнеров, переданных во входных путях",
+    )
+    parser.add_argument(
+        "--urlsafe", action="store_true",
+        help="URL-safe алфавит (- и _ вместо + и /)",
+    )
+    parser.add_argument(
+        "--wrap", type=int, default=0, metavar="N",
+        help="переносить строки каждые N символов (CRLF)",
+    )
+    parser.add_argument(
+        "--mime", action="store_const", dest="wrap", const=b64formats.MIME_LINE_LENGTH,
+        help=f"MIME-разбивка: строки по {b64formats.MIME_LINE_LENGTH} символов",
+    )
+    parser.add_argument(
+        "--data-uri", action="store_true",
+        help="писать результат как data:<mime>;base64,... для встраивания в HTML",
+    )
+    parser.add_argument(
+        "--compress", choices=b64formats.COMPRESSIONS,
+        help="сжимать данные перед кодированием",
+    )
+    parser.add_argument(
+        "--mmap", choices=sorted(MMAP_MODES), default="auto",
+        help="чтение через mmap: auto — для файлов от "
+             f"{b64engine.MMAP_THRESHOLD // (1024 * 1024)} МиБ (по умолчанию), always, never",
+    )
+    parser.add_argument(
+        "-i", "--incremental", action="store_true",
+        help="пропускать файлы, не изменившиеся с прошлой конвертации "
+             f"(манифест {b64cache.MANIFEST_NAME} в каталоге сохранения)",
+    )
+    parser.add_argument(
+        "--hash", action="store_true",
+        help="в инкрементальном режиме сверять SHA-256, если изменился только mtime",
+    )
+    parser.add_argument(
+        "-f", "--force", action="store_true",
+        help="в инкрементальном режиме конвертировать всё заново и обновить манифест",
+    )
+    parser.add_argument(
+        "--dedup", nargs="?", const="link", choices=b64dedup.DEDUP_MODES,
+        help="кодировать одинаковые по содержимому файлы один раз; остальные результаты — "
+             "жёсткой ссылкой (link, по умолчанию), копией (copy) или записью "
+             f"в {b64dedup.ALIASES_NAME} (manifest)",
+    )
+    parser.add_argument(
+        "--schedule", choices=tuple(b64batch.SCHEDULES), default="stream",
+        help="порядок обработки: stream — в порядке обхода, не дожидаясь его конца (по умолчанию); "
+             "size — после обхода: крупные файлы первыми, мелкие пачками, очень крупные "
+             "кодируются диапазонами параллельно",
+    )
+    parser.add_argument(
+        "--journal", nargs="?", const="", metavar="FILE",
+        help="вести журнал запуска и продолжить прерванный запуск с тем же журналом "
+             f"(по умолчанию {b64journal.JOURNAL_NAME} в каталоге сохранения или текущем)",
+    )
+    parser.add_argument(
+        "--log", metavar="FILE",
+        help="журнал запуска в JSON Lines: замеры по каждому файлу и итоговая строка summary",
+    )
+    parser.add_argument(
+        "--stats", action="store_true",
+        help="вывести итоги: пропускная способность, время стадий, загрузка воркеров, медленные файлы",
+    )
+    parser.add_argument(
+        "--profile", metavar="FILE",
+        help="собрать профиль cProfile в FILE (python -m pstats FILE); файлы из пула процессов не входят",
+    )
+    parser.add_argument(
+        "--stdout", action="store_true",
+        help="писать результат в stdout (только для одного входного файла)",
+    )
+    parser.add_argument(
+        "-q", "--quiet", action="store_true",
+        help="не выводить построчный отчёт",
+    )
+    parser.add_argument(
+        "--serve", nargs="?", const="127.0.0.1:8642", metavar="[HOST:]PORT",
+        help="запустить локальный HTTP-сервис конвертации (нужен bottle; см. b64server.py)",
+    )
+    parser.add_argument(
+        "--gui", action="store_true",
+        help="открыть графический интерфейс",
+    )
+    return parser
+
+
+def collect_jobs(inputs, extensions=None, recursive=False, output_dir=None, decode=False, restore_ext=None,
+                 include=None, exclude=None):
+    """
+    Лениво выдаёт задания (исходный путь, путь результата[, размер]).
+    Директории обходятся через b64api.directory_jobs.
+    """
+    for item in inputs:
+        if os.path.isdir(item):
+            yield from b64api.directory_jobs(
+                item, output_dir, extensions, recursive, include, exclude, decode, restore_ext,
+                on_error=_report_scan_error,
+            )
+        elif decode:
+            yield item, b64engine.build_decoded_path(item, output_dir, restore_ext)
+        else:
+            yield item, b64engine.build_output_path(item, output_dir)
+
+
+def collect_bundle_entries(inputs, extensions=None, recursive=False, include=None, exclude=None):
+    """
+    Выдаёт (исходный путь, имя в контейнере, размер). Имена — относительные пути
+    с разделителем /; при нескольких входных путях к ним добавляется имя входа.
+    """
+    exclude = list(exclude or []) + list(b64scan.OWN_OUTPUT_PATTERNS)
+    for item in inputs:
+        prefix = f"{os.path.basename(os.path.normpath(item))}/" if len(inputs) > 1 else ""
+        if os.path.isdir(item):
+            for entry in b64scan.scan(item, extensions, recursive, include, exclude, on_error=_report_scan_error):
+                name = os.path.relpath(entry.path, item).replace(os.sep, "/")
+                yield entry.path, prefix + name, entry.size
+        else:
+            yield item, os.path.basename(item), os.path.getsize(item)
+
+
+def run_bundle_commands(args, extensions):
+    """Упаковка, распаковка и просмотр контейнеров b64bundle."""
+    try:
+        if args.list:
+            for bundle_path in args.inputs:
+                for entry in b64bundle.list_bundle(bundle_path):
+                    print(f"{entry.size:>14}  {entry.name}")
+            return 0
+        if args.extract:
+            for bundle_path in args.inputs:
+                for target in b64bundle.extract_bundle(bundle_path, args.output_dir or ".", args.entry):
+                    if not args.quiet:
+                        print(f"OK    {bundle_path} -> {target}", file=sys.stderr)
+            return 0
+        entries = list(collect_bundle_entries(args.inputs, extensions, args.recursive, args.include, args.exclude))
+        if not entries:
+            print("Нет подходящих файлов", file=sys.stderr)
+            return 1
+        bundle_dir = os.path.dirname(args.bundle)
+        if bundle_dir:
+            os.makedirs(bundle_dir, exist_ok=True)
+        b64bundle.write_bundle(entries, args.bundle)
+        if not args.quiet:
+            print(f"Упаковано файлов: {len(entries)} -> {args.bundle}", file=sys.stderr)
+        return 0
+    except (OSError, ValueError) as e:
+        print(f"ERROR {e}", file=sys.stderr)
+        return 1
+
+
+def _report_scan_error(error):
+    print(f"ERROR {error}", file=sys.stderr)
+
+
+def output_format_from_args(args):
+    return b64formats.validate_format(b64formats.OutputFormat(
+        alphabet="urlsafe" if args.urlsafe else "standard",
+        wrap=args.wrap,
+        data_uri=args.data_uri,
+        compression=args.compress,
+    ))
+
+
+def pipe(src, decode=False, output_format=b64formats.PLAIN, mime_type="application/octet-stream"):
+    """Конвертирует поток src в stdout."""
+    try:
+        if decode:
+            b64formats.decode_stream(src, sys.stdout.buffer, output_format)
+        else:
+            b64formats.encode_stream(src, sys.stdout.buffer, output_format, mime_type=mime_type)
+    except b64engine.InvalidBase64Error as e:
+        print(f"ERROR {e}", file=sys.stderr)
+        return 1
+    finally:
+        sys.stdout.buffer.flush()
+    return 0
+
+
+def run_verify(args, extensions, output_format):
+    """Сверка результатов с исходными файлами; выводит только проблемы (и OK без -q)."""
+    jobs = b64verify.locate_outputs(collect_jobs(
+        args.inputs, extensions, args.recursive, args.output_dir, include=args.include, exclude=args.exclude,
+    ))
+    counts = dict.fromkeys(b64verify.STATUSES, 0)
+    for result in b64verify.verify_many(jobs, args.workers, output_format):
+        counts[result.status] += 1
+        if result.status != b64verify.VERIFY_OK:
+            print(f"{result.status.upper():<9} {result.source} -> {result.output}: {result.detail}", file=sys.stderr)
+        elif not args.quiet:
+            print(f"OK        {result.source} -> {result.output}", file=sys.stderr)
+    if not sum(counts.values()):
+        print("Нет подходящих файлов", file=sys.stderr)
+        return 1
+    if not args.quiet:
+        print(f"Проверено: {sum(counts.values())}, совпадает: {counts[b64verify.VERIFY_OK]}, "
+              f"расхождений: {counts[b64verify.VERIFY_MISMATCH]}, усечённых: {counts[b64verify.VERIFY_TRUNCATED]}, "
+              f"нет результата: {counts[b64verify.VERIFY_MISSING]}, ошибок: {counts[b64verify.VERIFY_ERROR]}",
+              file=sys.stderr)
+    return 0 if counts[b64verify.VERIFY_OK] == sum(counts.values()) else 1
+
+
+def run_server(args):
+    # Ленивая загрузка: bottle и gevent нужны только в режиме сервиса
+    import b64server
+    argv = [args.serve, "-j", str(args.workers)]
+    if args.quiet:
+        argv.append("-q")
+    return b64server.main(argv)
+
+
+def run_gui():
+    # Ленивая загрузка: Tk и модули буфера обмена нужны только здесь
+    import ConverterToB64
+    ConverterToB64.create_ask_window()
+    return 0
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        return run_server(args)
+    if args.gui or not args.inputs:
+        return run_gui()
+
+    try:
+        output_format = output_format_from_args(args)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.inputs == ["-"]:
+        return pipe(sys.stdin.buffer, args.decode, output_format)
+    if "-" in args.inputs:
+        parser.error("'-' нельзя сочетать с другими входными путями")
+
+    if args.stdout:
+        if len(args.inputs) != 1 or os.path.isdir(args.inputs[0]):
+            parser.error("--stdout работает только с одним входным файлом")
+        with open(args.inputs[0], "rb") as src:
+            return pipe(src, args.decode, output_format, b64formats.guess_mime_type(args.inputs[0]))
+
+    extensions = b64scan.parse_extensions(" ".join(args.ext or []))
+    if args.bundle and output_format != b64formats.PLAIN:
+        parser.error("контейнер (--bundle) пишется стандартным Base64; --urlsafe, --wrap, --mime, "
+                     "--data-uri и --compress с ним не сочетаются")
+    if args.bundle or args.extract or args.list:
+        return run_bundle_commands(args, extensions)
+    if args.verify:
+        if args.decode:
+            parser.error("--verify сверяет результаты кодирования; --decode с ним не сочетается")
+        return run_verify(args, extensions, output_format)
+
+    jobs = b64api.ensure_output_dirs(collect_jobs(
+        args.inputs, extensions, args.recursive, args.output_dir, args.decode, args.restore_ext,
+        args.include, args.exclude,
+    ))
+
+    journal = None
+    if args.journal is not None:
+        journal_path = args.journal or os.path.join(args.output_dir or ".", b64journal.JOURNAL_NAME)
+        journal = b64journal.JobJournal(journal_path, run_key={
+            "inputs": [os.path.abspath(item) for item in args.inputs],
+            "decode": args.decode, "ext": extensions, "recursive": args.recursive,
+            "include": args.include, "exclude": args.exclude, "format": output_format,
+            "output_dir": os.path.abspath(args.output_dir or ""),
+        })
+        jobs = journal.select(jobs)
+
+    cache = None
+    if args.incremental or args.hash or args.force:
+        cache = b64cache.IncrementalCache(use_hash=args.hash, force=args.force,
+                                          output_format=None if args.decode else output_format)
+        jobs = cache.select(jobs)
+
+    if args.dedup:
+        convert = functools.partial(b64dedup.convert_deduplicated, mode=args.dedup, schedule=args.schedule)
+    else:
+        convert = b64batch.SCHEDULES[args.schedule]
+
+    recorder = None
+    if args.log or args.stats or args.profile:
+        recorder = b64stats.RunRecorder(args.log, args.profile, args.workers)
+
+    count = 0
+    errors = 0
+    finished = False
+    try:
+        for result in convert(
+            jobs, workers=args.workers, use_mmap=MMAP_MODES[args.mmap], decode=args.decode,
+            output_format=output_format, recorder=recorder,
+        ):
+            if recorder:
+                recorder.record(result)
+            if result.error is None:
+                count += 1
+                if journal:
+                    journal.record(result)
+                if cache:
+                    cache.record(result)
+                if not args.quiet:
+                    print(f"OK    {result.source} -> {result.output}", file=sys.stderr)
+            else:
+                errors += 1
+                print(f"ERROR {result.source}: {result.error}", file=sys.stderr)
+        finished = True
+    finally:
+        if cache:
+            cache.save()
+        if journal:
+            # Журнал остаётся, если запуск прерван или были ошибки — для продолжения
+            if errors or not finished:
+                journal.close()
+            else:
+                journal.complete()
+        summary = recorder.close() if recorder else None
+
+    if args.stats and summary:
+        for line in b64stats.format_summary(summary):
+            print(line, file=sys.stderr)
+
+    skipped = len(cache.skipped) if cache else 0
+    resumed = len(journal.skipped) if journal else 0
+    if not count and not errors and not skipped and not resumed:
+        print("Нет подходящих файлов", file=sys.stderr)
+        return 1
+    if not args.quiet:
+        if resumed:
+            print(f"Готово с прерванного запуска: {resumed}", file=sys.stderr)
+        print(f"Сконвертировано: {count}, пропущено без изменений: {skipped}, ошибок: {errors}", file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    # freeze_support нужен только собранному exe; скрипту лишний импорт не нужен
+    if getattr(sys, "frozen", False):
+        import multiprocessing
+        multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,106 @@
+import os
+import sys
+import struct
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import pyperclip
+
+# === Экспорт в буфер обмена ===
+# Все операции выполняются в одном фоновом потоке: интерфейс получает Future
+# и не ждёт чтения больших файлов и сборки длинных списков путей.
+# Слишком большой текст не копируется строкой — вместо него в буфер
+# кладётся сам файл (CF_HDROP), как при копировании в Проводнике.
+
+IS_WINDOWS = sys.platform == "win32"
+TEXT_COPY_LIMIT = 32 * 1024 * 1024  # больше 32 МиБ текст как строку не копируем
+
+# Попытка импорта pywin32 только на Windows
+pywin32_available = False
+if IS_WINDOWS:
+    try:
+        import win32clipboard
+        pywin32_available = True
+    except ImportError:
+        print("Библиотека pywin32 не найдена. Установите её: pip install pywin32")
+
+# kind: "text" — содержимое строкой, "files" — файлы (CF_HDROP), "paths" — пути строкой
+ClipboardResult = namedtuple("ClipboardResult", "kind count")
+
+# Один поток: буфер обмена — общий ресурс, операции не должны перемешиваться
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="clipboard")
+
+
+def build_hdrop(file_paths):
+    """
+    Собирает данные CF_HDROP: структура DROPFILES и список путей в UTF-16LE.
+    Несуществующие файлы пропускаются; возвращает (данные, список путей).
+    """
+    valid_paths = []
+    for p in file_paths:
+        clean_path = os.path.abspath(os.path.normpath(p))
+        if os.path.exists(clean_path):
+            valid_paths.append(clean_path)
+        else:
+            print(f"Файл не найден: {clean_path}")
+    if not valid_paths:
+        return None, []
+
+    # Структура DROPFILES (в байтах, little-endian):
+    #   DWORD pFiles;   // смещение к началу строк (обычно 20)
+    #   POINT pt;       // x=0, y=0 → 2×DWORD
+    #   BOOL fNC;       // 0
+    #   BOOL fWide;     // 1 → Unicode
+    dropfiles_header = struct.pack("IIIII", 20, 0, 0, 0, 1)
+
+    # Формат: file1\0file2\0...\0\0
+    file_list = "\0".join(valid_paths) + "\0\0"
+    return dropfiles_header + file_list.encode("utf-16le"), valid_paths
+
+
+def copy_files_to_clipboard(file_paths):
+    """
+    Копирует список файлов в буфер обмена Windows в формате CF_HDROP (как делает Проводник).
+    Работает на всех версиях pywin32.
+    """
+    if not file_paths or not pywin32_available:
+        return False
+    try:
+        clipboard_data, valid_paths = build_hdrop(file_paths)
+        if not valid_paths:
+            return False
+        win32clipboard.OpenClipboard()
+        try:
+            win32clipboard.EmptyClipboard()
+            win32clipboard.SetClipboardData(win32clipboard.CF_HDROP, clipboard_data)
+        finally:
+            win32clipboard.CloseClipboard()
+        return True
+    except Exception as e:
+        print(f"Ошибка при копировании файлов: {e}")
+        return False
+
+
+def copy_files(file_paths):
+    """Копирует файлы (CF_HDROP); без pywin32 или при ошибке — их пути строкой."""
+    if copy_files_to_clipboard(file_paths):
+        return ClipboardResult("files", len(file_paths))
+    pyperclip.copy("\n".join(file_paths))
+    return ClipboardResult("paths", len(file_paths))
+
+
+def copy_text_file(file_path, limit=TEXT_COPY_LIMIT):
+    """
+    Копирует содержимое .base64.txt строкой. Если файл больше limit,
+    вместо текста копируется сам файл (или его путь).
+    """
+    if os.path.getsize(file_path) > limit:
+        return copy_files([file_path])
+    with open(file_path, "r", encoding="utf-8") as f:
+        pyperclip.copy(f.read())
+    return ClipboardResult("text", 1)
+
+
+def submit(function, *args):
+    """Выполняет операцию с буфером обмена в фоновом потоке; возвращает Future."""
+    return _executor.submit(function, *args)
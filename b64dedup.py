@@ -0,0 +1,169 @@
+import os
+import json
+import time
+import shutil
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import b64batch
+import b64cache
+import b64engine
+import b64formats
+
+# === Дедупликация одинаковых файлов в пакете ===
+# Кандидаты в дубликаты — только файлы одинакового размера; их содержимое
+# сверяется по SHA-256 (потоково, параллельно). Каждое уникальное содержимое
+# кодируется один раз, а результаты для копий создаются жёсткой ссылкой,
+# копированием готового результата или записью в манифест псевдонимов.
+# Для сравнения размеров нужен полный список заданий, поэтому этот этап
+# дожидается окончания обхода директории.
+
+DEDUP_MODES = ("link", "copy", "manifest")
+ALIASES_NAME = b64engine.ALIASES_NAME
+
+
+def _job_size(job):
+    return job[2] if len(job) > 2 else b64batch.file_size(job[0])
+
+
+def group_duplicates(jobs, output_format=None, workers=None):
+    """
+    Группирует задания по содержимому исходных файлов.
+
+    :param jobs: итерируемое кортежей (исходный путь, путь результата[, размер])
+    :param output_format: если результат зависит от имени файла (data: URI с типом
+        по расширению), файлы разных типов в одну группу не попадают
+    :return: список групп; первая запись группы кодируется, остальные — её копии
+    """
+    by_size = defaultdict(list)
+    for job in jobs:
+        by_size[_job_size(job)].append(job)
+
+    candidates = [job for same_size in by_size.values() if len(same_size) > 1 for job in same_size]
+    with ThreadPoolExecutor(max_workers=workers or b64batch.DEFAULT_WORKERS) as pool:
+        digests = dict(zip(
+            (job[0] for job in candidates),
+            pool.map(_safe_hash, (job[0] for job in candidates)),
+        ))
+
+    by_content = defaultdict(list)
+    groups = []
+    for size, same_size in by_size.items():
+        for job in same_size:
+            digest = digests.get(job[0])
+            if digest is None:
+                # Уникальный размер или файл не читается — отдельная группа
+                groups.append([job])
+                continue
+            key = (size, digest)
+            if output_format is not None and output_format.data_uri:
+                key += (b64formats.guess_mime_type(job[0]),)
+            if key not in by_content:
+                groups.append(by_content[key])
+            by_content[key].append(job)
+    return groups
+
+
+def _safe_hash(source_path):
+    try:
+        return b64cache.hash_file(source_path)
+    except OSError:
+        return None
+
+
+def materialize(primary_output, output_path, mode):
+    """Создаёт результат копии из результата первого файла группы."""
+    if mode == "manifest":
+        return primary_output
+    if os.path.abspath(primary_output) == os.path.abspath(output_path):
+        return output_path
+    # Ссылка или копия создаётся под временным именем и атомарно заменяет результат
+    part_path = output_path + b64engine.PART_SUFFIX
+    if os.path.exists(part_path):
+        os.remove(part_path)
+    try:
+        if mode == "link":
+            try:
+                os.link(primary_output, part_path)
+            except OSError:
+                # Другой том или ФС без жёстких ссылок — копируем
+                shutil.copyfile(primary_output, part_path)
+        else:
+            shutil.copyfile(primary_output, part_path)
+        os.replace(part_path, output_path)
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+    return output_path
+
+
+def write_aliases(aliases):
+    """
+    Дописывает псевдонимы в .b64aliases.json в каталогах результатов.
+
+    :param aliases: список (исходный путь, несозданный путь результата, путь готового результата)
+    """
+    by_dir = defaultdict(dict)
+    for source_path, output_path, primary_output in aliases:
+        directory = os.path.dirname(os.path.abspath(output_path))
+        by_dir[directory][os.path.abspath(output_path)] = {
+            "source": os.path.abspath(source_path),
+            "same_as": os.path.abspath(primary_output),
+        }
+    for directory, entries in by_dir.items():
+        path = os.path.join(directory, ALIASES_NAME)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                existing = json.load(f)
+        except (OSError, ValueError):
+            existing = {}
+        existing.update(entries)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(existing, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, path)
+
+
+def convert_deduplicated(jobs, mode="link", workers=None, on_progress=None, output_format=None, schedule="stream",
+                         **convert_kwargs):
+    """
+    Как b64batch.convert_many, но одинаковое содержимое кодируется один раз.
+
+    :param mode: "link" — жёсткая ссылка (при невозможности — копия),
+        "copy" — копия готового результата, "manifest" — только запись
+        в .b64aliases.json, output в результате указывает на готовый файл
+    :param on_progress: колбэк прироста байт; для копий вызывается с их размером
+    :param schedule: порядок обработки уникальных файлов (ключ b64batch.SCHEDULES)
+    :return: генератор ConvertResult; для копий — по одному на каждую
+    """
+    if mode not in DEDUP_MODES:
+        raise ValueError(f"Неизвестный режим дедупликации: {mode}")
+    groups = group_duplicates(jobs, output_format, workers)
+    copies = {group[0][0]: group[1:] for group in groups if len(group) > 1}
+    aliases = []
+    try:
+        for result in b64batch.SCHEDULES[schedule](
+            [group[0] for group in groups], workers=workers, on_progress=on_progress,
+            output_format=output_format, **convert_kwargs
+        ):
+            yield result
+            for job in copies.get(result.source, ()):
+                if result.error is not None:
+                    yield b64batch.ConvertResult(job[0], job[1], 0, result.error)
+                    continue
+                started = time.perf_counter()
+                try:
+                    output = materialize(result.output, job[1], mode)
+                except OSError as e:
+                    yield b64batch.ConvertResult(job[0], job[1], 0, e, time.perf_counter() - started)
+                    continue
+                if mode == "manifest":
+                    aliases.append((job[0], job[1], result.output))
+                size = _job_size(job)
+                if on_progress:
+                    on_progress(size)
+                yield b64batch.ConvertResult(job[0], output, size, None, time.perf_counter() - started)
+    finally:
+        if aliases:
+            write_aliases(aliases)
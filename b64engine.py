@@ -0,0 +1,468 @@
+import os
+import re
+import json
+import mmap
+import binascii
+import datetime
+
+# === Потоковый кодировщик Base64 ===
+# Файл читается блоками фиксированного размера, кратного 3 байтам, поэтому
+# каждый блок кодируется независимо и без паддинга внутри результата.
+# Пиковое потребление памяти не зависит от размера исходного файла.
+
+CHUNK_SIZE = 3 * 1024 * 1024  # 3 МиБ — кратно 3, паддинг только в последнем блоке
+OUTPUT_SUFFIX = ".base64.txt"
+MMAP_THRESHOLD = 16 * 1024 * 1024  # файлы от 16 МиБ читаются через mmap
+DECODE_CHUNK_SIZE = 4 * 1024 * 1024  # символов Base64 за одно чтение при декодировании
+WHITESPACE = b" \t\r\n"  # допускаются переносы строк (например, MIME-разбивка)
+DATE_SUFFIX_RE = re.compile(r"-\d{4}-\d{2}-\d{2}$")
+PART_SUFFIX = ".b64part"  # недописанный результат
+CHECKPOINT_SUFFIX = ".json"  # контрольная точка рядом с .b64part
+CHECKPOINT_BYTES = 64 * 1024 * 1024  # контрольная точка каждые 64 МиБ исходных данных
+CHECKPOINT_PLAIN = "plain"  # точка последовательной записи стандартного Base64 (encode_file)
+CHECKPOINT_RANGES = "ranges"  # точка записи диапазонами (b64batch.convert_scheduled)
+# Имена остальных собственных файлов — здесь, чтобы обход директорий (b64scan)
+# мог их исключать, не загружая модули, которые их пишут
+BUNDLE_SUFFIX = ".b64bundle.txt"  # контейнер (b64bundle)
+MANIFEST_NAME = ".b64manifest.json"  # манифест инкрементальной конвертации (b64cache)
+ALIASES_NAME = ".b64aliases.json"  # манифест псевдонимов дедупликации (b64dedup)
+JOURNAL_NAME = ".b64journal.jsonl"  # журнал пакетного задания (b64journal)
+
+
+class ConversionCancelled(Exception):
+    """Конвертация прервана пользователем."""
+
+
+class InvalidBase64Error(ValueError):
+    """Входные данные не являются корректным Base64."""
+
+
+def align_chunk_size(chunk_size):
+    """Округляет размер блока вниз до кратного 3 (но не меньше 3)."""
+    return max(3, chunk_size - chunk_size % 3)
+
+
+def encoded_length(size):
+    """Длина Base64-текста для size байт (с паддингом)."""
+    return 4 * ((size + 2) // 3)
+
+
+def build_output_path(source_path, save_dir=None):
+    """
+    Возвращает путь результата в формате <имя>-<ГГГГ-ММ-ДД>.base64.txt.
+
+    :param source_path: путь к исходному файлу
+    :param save_dir: каталог сохранения; если не задан — каталог исходного файла
+    """
+    save_dir = save_dir or os.path.dirname(source_path)
+    name = os.path.splitext(os.path.basename(source_path))[0]
+    return os.path.join(save_dir, f"{name}-{datetime.date.today()}{OUTPUT_SUFFIX}")
+
+
+class AtomicOutput:
+    """
+    Запись результата через временный файл <результат>.b64part: готовый файл
+    появляется под своим именем только целиком (os.replace), поэтому после
+    сбоя не остаётся усечённых результатов. Замена создаёт новый файл,
+    так что жёсткие ссылки (дедупликация) на прежний результат не меняются.
+
+    Для крупных файлов можно сохранять контрольные точки (checkpoint):
+    при прерывании (KeyboardInterrupt, завершение процесса) временный файл
+    и точка остаются, и следующий запуск продолжает с неё (см. load_checkpoint).
+    При ошибке или отмене временный файл удаляется.
+
+    Временный файл можно сразу создать полной длины (length) — тогда его
+    заполняют по частям другие процессы (b64formats.encode_range),
+    а результат фиксируют вызовом commit() или отменяют discard(). Точка
+    такого файла хранит список готовых частей (b64batch.convert_scheduled).
+    """
+
+    def __init__(self, output_path, resume_length=None, length=None):
+        """
+        :param resume_length: продолжить временный файл, обрезав его до этой длины;
+            None — начать заново
+        :param length: создать временный файл заданной длины (заполненный нулями)
+        """
+        self.output_path = output_path
+        self.part_path = output_path + PART_SUFFIX
+        self.checkpoint_path = self.part_path + CHECKPOINT_SUFFIX
+        if resume_length is None:
+            # Контрольная точка прежней записи (возможно, в другом формате)
+            # не относится к новому временному файлу
+            _remove_quietly(self.checkpoint_path)
+            self.file = open(self.part_path, "wb")
+            if length is not None:
+                self.file.truncate(length)
+        else:
+            self.file = open(self.part_path, "r+b")
+            self.file.truncate(resume_length)
+            self.file.seek(resume_length)
+        self.checkpointed = resume_length is not None
+
+    def write(self, data):
+        return self.file.write(data)
+
+    def checkpoint(self, state):
+        """
+        Сбрасывает записанное на диск и сохраняет точку продолжения (dict).
+        output_length по умолчанию — текущая позиция записи.
+        """
+        self.file.flush()
+        # fsync сбрасывает весь файл, в том числе записанное другими процессами
+        os.fsync(self.file.fileno())
+        state = dict(state)
+        state.setdefault("output_length", self.file.tell())
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.checkpoint_path)
+        self.checkpointed = True
+
+    def __enter__(self):
+        return self
+
+    def commit(self):
+        """Ставит готовый результат на место."""
+        self.file.close()
+        os.replace(self.part_path, self.output_path)
+        _remove_quietly(self.checkpoint_path)
+
+    def keep(self):
+        """Закрывает временный файл, оставляя его и контрольную точку для продолжения."""
+        self.file.close()
+
+    def discard(self):
+        """Удаляет недописанный результат."""
+        self.file.close()
+        _remove_quietly(self.part_path)
+        _remove_quietly(self.checkpoint_path)
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        elif self.checkpointed and issubclass(exc_type, (KeyboardInterrupt, SystemExit)):
+            self.keep()
+        else:
+            self.discard()
+        return False
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def open_output(output_path, resume_length=None, length=None):
+    """Открывает результат на атомарную запись (см. AtomicOutput)."""
+    return AtomicOutput(output_path, resume_length, length)
+
+
+def source_state(source_path, mode=CHECKPOINT_PLAIN):
+    """
+    Отпечаток для контрольных точек: размер и mtime исходного файла
+    и способ записи (mode), которым создан временный файл.
+    """
+    st = os.stat(source_path)
+    return {"source_size": st.st_size, "source_mtime_ns": st.st_mtime_ns, "mode": mode}
+
+
+def load_checkpoint(output_path, source_path, mode=CHECKPOINT_PLAIN):
+    """
+    Возвращает контрольную точку прерванной записи output_path, если исходный
+    файл с тех пор не менялся, а запись велась тем же способом mode; иначе None.
+    """
+    part_path = output_path + PART_SUFFIX
+    try:
+        with open(part_path + CHECKPOINT_SUFFIX, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        expected = source_state(source_path, mode)
+        if {key: state.get(key) for key in expected} != expected:
+            return None
+        if os.path.getsize(part_path) < state["output_length"]:
+            return None
+        return state
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+class LimitedReader:
+    """Читает из потока не больше limit байт."""
+
+    def __init__(self, stream, limit):
+        self.stream = stream
+        self.remaining = limit
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.stream.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def readinto(self, buffer):
+        view = memoryview(buffer)
+        if len(view) > self.remaining:
+            view = view[:self.remaining]
+        n = self.stream.readinto(view)
+        self.remaining -= n
+        return n
+
+
+def _fill(src, view):
+    """Читает из src, пока буфер не заполнится или не закончится поток."""
+    filled = 0
+    while filled < len(view):
+        n = src.readinto(view[filled:])
+        if not n:
+            break
+        filled += n
+    return filled
+
+
+def encode_stream(src, dst, chunk_size=CHUNK_SIZE, on_progress=None, cancel_event=None):
+    """
+    Кодирует бинарный поток src в Base64 и пишет результат в бинарный поток dst.
+
+    Блок чтения выделяется один раз и переиспользуется (readinto), закодированный
+    блок сразу записывается в dst. Результат побайтно совпадает с
+    base64.b64encode(src.read()).
+
+    :param src: бинарный поток с методом readinto
+    :param dst: бинарный поток для записи
+    :param chunk_size: размер блока чтения (округляется до кратного 3)
+    :param on_progress: необязательный колбэк, получает число прочитанных байт
+    :param cancel_event: объект с методом is_set(); проверяется перед каждым блоком
+    :return: количество прочитанных байт
+    """
+    buffer = bytearray(align_chunk_size(chunk_size))
+    view = memoryview(buffer)
+    total = 0
+    while True:
+        if cancel_event is not None and cancel_event.is_set():
+            raise ConversionCancelled()
+        n = _fill(src, view)
+        if not n:
+            break
+        dst.write(binascii.b2a_base64(view[:n], newline=False))
+        total += n
+        if on_progress:
+            on_progress(total)
+        if n < len(view):
+            break
+    return total
+
+
+def map_file(src):
+    """
+    Отображает открытый файл src в память только для чтения.
+    Возвращает None, если файл нельзя отобразить (канал, пустой файл,
+    неподдерживаемая файловая система) — тогда нужно читать через encode_stream.
+    """
+    try:
+        mapped = mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if hasattr(mapped, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+        mapped.madvise(mmap.MADV_SEQUENTIAL)
+    return mapped
+
+
+def encode_buffer(buffer, dst, chunk_size=CHUNK_SIZE, on_progress=None, cancel_event=None, start=0):
+    """
+    Кодирует объект с буферным протоколом (bytes, mmap) блоками: кодировщику
+    передаются срезы memoryview без копирования в память Python. Для mmap
+    упреждающее чтение остаётся на кэше страниц ОС.
+
+    :param start: смещение начала (кратно 3) — для продолжения с контрольной точки
+    :return: количество закодированных байт
+    """
+    step = align_chunk_size(chunk_size)
+    with memoryview(buffer) as view:
+        total = len(view)
+        for offset in range(start, total, step):
+            if cancel_event is not None and cancel_event.is_set():
+                raise ConversionCancelled()
+            end = min(offset + step, total)
+            dst.write(binascii.b2a_base64(view[offset:end], newline=False))
+            if on_progress:
+                on_progress(end)
+    return total - start
+
+
+def should_mmap(source_path, use_mmap=None):
+    """
+    Решает, читать ли файл через mmap.
+
+    :param use_mmap: True — всегда пытаться, False — никогда,
+        None — только для обычных файлов не меньше MMAP_THRESHOLD
+    """
+    if use_mmap is False:
+        return False
+    try:
+        st = os.stat(source_path)
+    except OSError:
+        return False
+    if not os.path.isfile(source_path) or st.st_size == 0:
+        return False
+    return use_mmap or st.st_size >= MMAP_THRESHOLD
+
+
+def _with_checkpoints(output, state, start, on_progress):
+    """Оборачивает колбэк прогресса: каждые CHECKPOINT_BYTES сохраняет контрольную точку."""
+    last = start
+
+    def report(total):
+        nonlocal last
+        # Смещение кратно 3 — результат до него не зависит от следующих байт
+        if total - last >= CHECKPOINT_BYTES and total % 3 == 0:
+            output.checkpoint(dict(state, offset=total))
+            last = total
+        if on_progress:
+            on_progress(total)
+
+    return report
+
+
+def encode_file(source_path, output_path, chunk_size=CHUNK_SIZE, on_progress=None, cancel_event=None,
+                use_mmap=None, stats=None):
+    """
+    Кодирует файл source_path в output_path потоково.
+    Крупные файлы читаются через mmap, при невозможности — буферизованно.
+    Результат записывается атомарно (AtomicOutput); при отмене или ошибке
+    недописанный файл удаляется. Для файлов крупнее CHECKPOINT_BYTES
+    сохраняются контрольные точки, и прерванная запись продолжается с последней.
+
+    :param use_mmap: см. should_mmap
+    :param stats: b64stats.FileStats для замеров чтения и записи; None — без замеров
+    :return: количество прочитанных байт (при продолжении — вместе с пропущенными)
+    """
+    checkpoint = load_checkpoint(output_path, source_path)
+    start = checkpoint["offset"] if checkpoint else 0
+    resume_length = checkpoint["output_length"] if checkpoint else None
+    with open(source_path, "rb") as src, open_output(output_path, resume_length) as output:
+        size = os.fstat(src.fileno()).st_size
+        dst = stats.writer(output) if stats is not None else output
+        if size > CHECKPOINT_BYTES:
+            on_progress = _with_checkpoints(output, source_state(source_path), start, on_progress)
+        mapped = map_file(src) if should_mmap(source_path, use_mmap) else None
+        if mapped is not None:
+            with mapped:
+                return start + encode_buffer(mapped, dst, chunk_size, on_progress, cancel_event, start)
+        # Для мелких файлов не выделяем полный блок в 3 МиБ
+        chunk_size = min(chunk_size, size + 3)
+        if start:
+            src.seek(start)
+            if on_progress:
+                on_progress = (lambda total, report=on_progress: report(start + total))
+        if stats is not None:
+            src = stats.reader(src)
+        return start + encode_stream(src, dst, chunk_size, on_progress, cancel_event)
+
+
+# === Потоковый декодировщик Base64 ===
+# Вход читается блоками; пробельные символы выбрасываются, а остаток до
+# кратного 4 переносится в следующий блок, так что каждый блок декодируется
+# независимо. Алфавит и паддинг проверяются строго (binascii strict_mode).
+
+def build_decoded_path(source_path, save_dir=None, extension=None):
+    """
+    Восстанавливает имя исходного файла из <имя>-<ГГГГ-ММ-ДД>.base64.txt.
+    Расширение исходного файла в имени результата не сохраняется,
+    поэтому его можно передать явно.
+
+    :param source_path: путь к .base64.txt
+    :param save_dir: каталог сохранения; если не задан — каталог source_path
+    :param extension: расширение восстановленного файла (например: pdf)
+    """
+    save_dir = save_dir or os.path.dirname(source_path)
+    name = os.path.basename(source_path)
+    if name.endswith(OUTPUT_SUFFIX):
+        name = name[:-len(OUTPUT_SUFFIX)]
+        name = DATE_SUFFIX_RE.sub("", name)
+    else:
+        name = os.path.splitext(name)[0]
+    if extension:
+        name = f"{name}.{extension.lstrip('.')}"
+    return os.path.join(save_dir, name)
+
+
+class Base64Decoder:
+    """
+    Пошаговый строгий декодировщик: feed() принимает очередной блок текста
+    и возвращает декодированные байты, finish() проверяет, что данные не усечены.
+    """
+
+    def __init__(self):
+        self._carry = b""
+        self._padded = False
+        self.consumed = 0  # значащих символов обработано — для сообщения об ошибке
+
+    def feed(self, block):
+        data = self._carry + block.translate(None, WHITESPACE)
+        cut = len(data) - len(data) % 4
+        quads, self._carry = data[:cut], data[cut:]
+        if not quads:
+            return b""
+        if self._padded:
+            raise InvalidBase64Error(f"Данные после паддинга '=' (символ {self.consumed})")
+        try:
+            decoded = binascii.a2b_base64(quads, strict_mode=True)
+        except binascii.Error as e:
+            raise InvalidBase64Error(f"Некорректный Base64 в блоке с символа {self.consumed}: {e}") from e
+        self._padded = quads.endswith(b"=")
+        self.consumed += cut
+        return decoded
+
+    def finish(self):
+        if self._carry:
+            raise InvalidBase64Error(f"Данные усечены: длина {self.consumed + len(self._carry)} не кратна 4")
+
+
+def decode_stream(src, dst, chunk_size=DECODE_CHUNK_SIZE, on_progress=None, cancel_event=None):
+    """
+    Декодирует Base64 из бинарного потока src в бинарный поток dst.
+
+    :param src: бинарный поток с Base64-текстом
+    :param dst: бинарный поток для записи
+    :param chunk_size: сколько символов читать за раз
+    :param on_progress: необязательный колбэк, получает число прочитанных символов
+    :param cancel_event: объект с методом is_set(); проверяется перед каждым блоком
+    :raises InvalidBase64Error: недопустимый символ, неверный паддинг или усечённые данные
+    :return: количество записанных байт
+    """
+    decoder = Base64Decoder()
+    read_total = 0
+    written = 0
+    while True:
+        if cancel_event is not None and cancel_event.is_set():
+            raise ConversionCancelled()
+        block = src.read(chunk_size)
+        if not block:
+            break
+        read_total += len(block)
+        decoded = decoder.feed(block)
+        if decoded:
+            dst.write(decoded)
+            written += len(decoded)
+        if on_progress:
+            on_progress(read_total)
+    decoder.finish()
+    return written
+
+
+def decode_file(source_path, output_path, chunk_size=DECODE_CHUNK_SIZE, on_progress=None, cancel_event=None,
+                stats=None):
+    """
+    Декодирует файл source_path в output_path потоково.
+    Результат записывается атомарно; при ошибке проверки или отмене
+    недописанный файл удаляется.
+
+    :param stats: b64stats.FileStats для замеров чтения и записи; None — без замеров
+    :return: количество записанных байт
+    """
+    with open(source_path, "rb") as src, open_output(output_path) as dst:
+        if stats is not None:
+            src, dst = stats.reader(src), stats.writer(dst)
+        return decode_stream(src, dst, chunk_size, on_progress, cancel_event)
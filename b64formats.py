@@ -0,0 +1,403 @@
+import os
+import importlib.util
+import zlib
+import binascii
+import mimetypes
+from collections import namedtuple
+
+import b64engine
+
+# zstandard — необязательная зависимость для сжатия zstd; импортируется
+# при первом использовании, здесь только проверяется наличие
+zstd_available = importlib.util.find_spec("zstandard") is not None
+
+# === Варианты вывода Base64 ===
+# Поверх потокового кодировщика: URL-safe алфавит, разбивка на строки (MIME),
+# префикс data: URI и сжатие перед кодированием. Всё применяется к каждому
+# блоку по мере записи, без полноразмерных копий результата.
+# Декодирование (Base64DecodingWriter) выполняет те же шаги в обратном порядке.
+
+MIME_LINE_LENGTH = 76
+LINE_END = b"\r\n"
+URLSAFE_TABLE = bytes.maketrans(b"+/", b"-_")
+# Обратная замена меняет символы местами: '+' и '/' в URL-safe тексте становятся
+# '-' и '_' и отвергаются строгим декодировщиком
+URLSAFE_DECODE_TABLE = bytes.maketrans(b"-_+/", b"+/-_")
+DATA_URI_PREFIX_LIMIT = 256  # наибольшая длина префикса data:<mime>;base64, при декодировании
+COMPRESSIONS = ("zlib", "zstd")
+
+# alphabet: "standard" | "urlsafe"; wrap: длина строки (0 — без переносов);
+# data_uri: писать префикс data:<mime>;base64,; compression: None | "zlib" | "zstd"
+OutputFormat = namedtuple("OutputFormat", "alphabet wrap data_uri compression", defaults=("standard", 0, False, None))
+
+PLAIN = OutputFormat()
+PRESETS = {
+    "standard": PLAIN,
+    "urlsafe": OutputFormat(alphabet="urlsafe"),
+    "mime": OutputFormat(wrap=MIME_LINE_LENGTH),
+    "data-uri": OutputFormat(data_uri=True),
+    "zlib": OutputFormat(compression="zlib"),
+}
+if zstd_available:
+    PRESETS["zstd"] = OutputFormat(compression="zstd")
+
+
+def validate_format(output_format):
+    """Проверяет сочетание параметров; бросает ValueError при недопустимом."""
+    if output_format.alphabet not in ("standard", "urlsafe"):
+        raise ValueError(f"Неизвестный алфавит: {output_format.alphabet}")
+    if output_format.wrap < 0:
+        raise ValueError("Длина строки не может быть отрицательной")
+    if output_format.compression not in (None,) + COMPRESSIONS:
+        raise ValueError(f"Неизвестное сжатие: {output_format.compression}")
+    if output_format.compression == "zstd" and not zstd_available:
+        raise ValueError("Для сжатия zstd установите библиотеку: pip install zstandard")
+    if output_format.data_uri and output_format.compression:
+        raise ValueError("data: URI нельзя сочетать со сжатием — браузер не распакует содержимое")
+    return output_format
+
+
+def splittable(output_format):
+    """
+    Можно ли кодировать файл независимыми диапазонами: длина текста каждого
+    диапазона зависит только от его размера (нет переносов строк, префикса и сжатия).
+    """
+    return not output_format.wrap and not output_format.data_uri and output_format.compression is None
+
+
+def guess_mime_type(source_path):
+    return mimetypes.guess_type(source_path)[0] or "application/octet-stream"
+
+
+def _make_compressor(compression):
+    if compression == "zlib":
+        return zlib.compressobj()
+    if compression == "zstd":
+        import zstandard
+        return zstandard.ZstdCompressor().compressobj()
+    return None
+
+
+def _make_decompressor(compression):
+    if compression == "zlib":
+        return zlib.decompressobj()
+    if compression == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().decompressobj()
+    return None
+
+
+class Base64Writer:
+    """
+    Файлоподобный объект: принимает исходные байты и пишет в dst Base64
+    в заданном формате. Остаток, не кратный 3 байтам, переносится
+    в следующий вызов write(); close() дописывает хвост и паддинг.
+    """
+
+    def __init__(self, dst, output_format=PLAIN, mime_type="application/octet-stream"):
+        self.dst = dst
+        self.format = validate_format(output_format)
+        self._compressor = _make_compressor(output_format.compression)
+        self._carry = b""
+        self._column = 0
+        if output_format.data_uri:
+            dst.write(f"data:{mime_type};base64,".encode("ascii"))
+
+    def write(self, data):
+        if self._compressor:
+            data = self._compressor.compress(data)
+        self._encode(data)
+
+    def close(self):
+        if self._compressor:
+            self._encode(self._compressor.flush())
+            self._compressor = None
+        self._encode(b"", final=True)
+        if self.format.wrap and self._column:
+            self.dst.write(LINE_END)
+            self._column = 0
+
+    def _encode(self, data, final=False):
+        if self._carry:
+            data = self._carry + bytes(data)
+        size = len(data)
+        cut = size if final else size - size % 3
+        self._carry = bytes(data[cut:])
+        if cut:
+            self._emit(binascii.b2a_base64(data[:cut], newline=False))
+
+    def _emit(self, text):
+        if self.format.alphabet == "urlsafe":
+            text = text.translate(URLSAFE_TABLE)
+        if self.format.wrap:
+            text = self._wrap(text)
+        self.dst.write(text)
+
+    def _wrap(self, text):
+        """Разбивает текст на строки, помня заполненность текущей строки между блоками."""
+        width = self.format.wrap
+        parts = []
+        pos = 0
+        if self._column:
+            take = width - self._column
+            if len(text) < take:
+                self._column += len(text)
+                return text
+            parts += [text[:take], LINE_END]
+            pos = take
+            self._column = 0
+        while pos + width <= len(text):
+            parts += [text[pos:pos + width], LINE_END]
+            pos += width
+        if pos < len(text):
+            parts.append(text[pos:])
+            self._column = len(text) - pos
+        return b"".join(parts)
+
+
+class Base64DecodingWriter:
+    """
+    Обратный к Base64Writer: принимает Base64-текст в заданном формате и пишет
+    в dst исходные байты. Префикс data: URI отбрасывается, URL-safe алфавит
+    переводится в стандартный, переносы строк пропускает строгий декодировщик
+    (b64engine.Base64Decoder), сжатые данные распаковываются потоково.
+    close() проверяет, что текст и сжатый поток не усечены.
+    """
+
+    def __init__(self, dst, input_format=PLAIN):
+        self.dst = dst
+        self.format = validate_format(input_format)
+        self.written = 0
+        self._decoder = b64engine.Base64Decoder()
+        self._decompressor = _make_decompressor(input_format.compression)
+        self._prefix = b"" if input_format.data_uri else None
+
+    def write(self, text):
+        if self._prefix is not None:
+            text = self._strip_prefix(bytes(text))
+            if not text:
+                return
+        if self.format.alphabet == "urlsafe":
+            text = bytes(text).translate(URLSAFE_DECODE_TABLE)
+        data = self._decoder.feed(bytes(text))
+        if data:
+            self._decompress(data)
+
+    def close(self):
+        if self._prefix is not None:
+            raise b64engine.InvalidBase64Error("Нет префикса data:<mime>;base64,")
+        self._decoder.finish()
+        if self._decompressor is not None:
+            if not getattr(self._decompressor, "eof", True):
+                raise b64engine.InvalidBase64Error("Сжатые данные усечены")
+            if getattr(self._decompressor, "unused_data", b""):
+                raise b64engine.InvalidBase64Error("Лишние данные после сжатого потока")
+            self._decompressor = None
+
+    def _strip_prefix(self, text):
+        """Копит начало текста до запятой префикса data: URI и возвращает остаток."""
+        self._prefix += text
+        end = self._prefix.find(b",")
+        if end < 0:
+            if len(self._prefix) > DATA_URI_PREFIX_LIMIT:
+                raise b64engine.InvalidBase64Error("Нет префикса data:<mime>;base64,")
+            return b""
+        prefix, rest = self._prefix[:end + 1], self._prefix[end + 1:]
+        if not prefix.startswith(b"data:") or not prefix.endswith(b";base64,"):
+            raise b64engine.InvalidBase64Error("Нет префикса data:<mime>;base64,")
+        self._prefix = None
+        return rest
+
+    def _decompress(self, data):
+        if self._decompressor is None:
+            self._emit(data)
+            return
+        try:
+            if self.format.compression == "zlib":
+                # Распаковка порциями: маленький сжатый блок может дать гигабайты
+                while data:
+                    self._emit(self._decompressor.decompress(data, b64engine.CHUNK_SIZE))
+                    data = self._decompressor.unconsumed_tail
+            else:
+                self._emit(self._decompressor.decompress(data))
+        except Exception as e:
+            # zlib.error и zstandard.ZstdError не имеют общего предка
+            raise b64engine.InvalidBase64Error(f"Повреждённые сжатые данные: {e}") from e
+
+    def _emit(self, data):
+        if data:
+            self.dst.write(data)
+            self.written += len(data)
+
+
+class _ChunkSink:
+    """Приёмник для Base64Writer: копит записанное до следующей выдачи."""
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, data):
+        self.parts.append(data)
+
+    def take(self):
+        data = b"".join(self.parts)
+        self.parts.clear()
+        return data
+
+
+def encode_chunks(src, output_format=PLAIN, mime_type="application/octet-stream", chunk_size=b64engine.CHUNK_SIZE):
+    """
+    Потоково кодирует src и выдаёт блоки Base64-текста по одному на прочитанный
+    блок — для ответа HTTP-сервиса и сверки с готовым результатом (b64verify).
+    """
+    sink = _ChunkSink()
+    writer = Base64Writer(sink, output_format, mime_type)
+    while True:
+        block = src.read(chunk_size)
+        if not block:
+            break
+        writer.write(block)
+        data = sink.take()
+        if data:
+            yield data
+    writer.close()
+    data = sink.take()
+    if data:
+        yield data
+
+
+def encode_stream(src, dst, output_format=PLAIN, chunk_size=b64engine.CHUNK_SIZE, on_progress=None,
+                  cancel_event=None, mime_type="application/octet-stream"):
+    """
+    Кодирует бинарный поток src в dst в заданном формате.
+
+    :return: количество прочитанных байт
+    """
+    writer = Base64Writer(dst, output_format, mime_type)
+    buffer = bytearray(b64engine.align_chunk_size(chunk_size))
+    view = memoryview(buffer)
+    total = 0
+    while True:
+        if cancel_event is not None and cancel_event.is_set():
+            raise b64engine.ConversionCancelled()
+        n = src.readinto(view)
+        if not n:
+            break
+        writer.write(view[:n])
+        total += n
+        if on_progress:
+            on_progress(total)
+    writer.close()
+    return total
+
+
+def _encode_mapped(mapped, dst, output_format, chunk_size, on_progress, cancel_event, mime_type):
+    writer = Base64Writer(dst, output_format, mime_type)
+    step = b64engine.align_chunk_size(chunk_size)
+    with memoryview(mapped) as view:
+        total = len(view)
+        for offset in range(0, total, step):
+            if cancel_event is not None and cancel_event.is_set():
+                raise b64engine.ConversionCancelled()
+            end = min(offset + step, total)
+            writer.write(view[offset:end])
+            if on_progress:
+                on_progress(end)
+    writer.close()
+    return total
+
+
+def encode_file(source_path, output_path, output_format=PLAIN, chunk_size=b64engine.CHUNK_SIZE,
+                on_progress=None, cancel_event=None, use_mmap=None, stats=None):
+    """
+    Кодирует файл в заданном формате. Для формата по умолчанию используется
+    быстрый путь b64engine.encode_file (с контрольными точками для продолжения);
+    остальные форматы после прерывания кодируются заново. Запись атомарная.
+
+    :param stats: b64stats.FileStats для замеров чтения и записи; None — без замеров
+    :return: количество прочитанных байт
+    """
+    if output_format == PLAIN:
+        return b64engine.encode_file(source_path, output_path, chunk_size, on_progress, cancel_event, use_mmap,
+                                     stats)
+    mime_type = guess_mime_type(source_path)
+    with open(source_path, "rb") as src, b64engine.open_output(output_path) as dst:
+        if stats is not None:
+            dst = stats.writer(dst)
+        mapped = b64engine.map_file(src) if b64engine.should_mmap(source_path, use_mmap) else None
+        if mapped is not None:
+            with mapped:
+                return _encode_mapped(mapped, dst, output_format, chunk_size, on_progress, cancel_event, mime_type)
+        chunk_size = min(chunk_size, os.fstat(src.fileno()).st_size + 3)
+        if stats is not None:
+            src = stats.reader(src)
+        return encode_stream(src, dst, output_format, chunk_size, on_progress, cancel_event, mime_type)
+
+
+def decode_stream(src, dst, input_format=PLAIN, chunk_size=b64engine.DECODE_CHUNK_SIZE, on_progress=None,
+                  cancel_event=None):
+    """
+    Декодирует из бинарного потока src текст в заданном формате (см. Base64DecodingWriter).
+
+    :param input_format: OutputFormat, в котором текст был закодирован
+    :param on_progress: колбэк, получает число прочитанных символов
+    :raises b64engine.InvalidBase64Error: текст не соответствует формату или усечён
+    :return: количество записанных байт
+    """
+    if input_format == PLAIN:
+        return b64engine.decode_stream(src, dst, chunk_size, on_progress, cancel_event)
+    writer = Base64DecodingWriter(dst, input_format)
+    read_total = 0
+    while True:
+        if cancel_event is not None and cancel_event.is_set():
+            raise b64engine.ConversionCancelled()
+        block = src.read(chunk_size)
+        if not block:
+            break
+        read_total += len(block)
+        writer.write(block)
+        if on_progress:
+            on_progress(read_total)
+    writer.close()
+    return writer.written
+
+
+def decode_file(source_path, output_path, input_format=PLAIN, chunk_size=b64engine.DECODE_CHUNK_SIZE,
+                on_progress=None, cancel_event=None, stats=None):
+    """
+    Декодирует файл, закодированный в заданном формате. Запись атомарная;
+    при ошибке проверки или отмене недописанный файл удаляется.
+
+    :param stats: b64stats.FileStats для замеров чтения и записи; None — без замеров
+    :return: количество записанных байт
+    """
+    if input_format == PLAIN:
+        return b64engine.decode_file(source_path, output_path, chunk_size, on_progress, cancel_event, stats)
+    with open(source_path, "rb") as src, b64engine.open_output(output_path) as dst:
+        if stats is not None:
+            src, dst = stats.reader(src), stats.writer(dst)
+        return decode_stream(src, dst, input_format, chunk_size, on_progress, cancel_event)
+
+
+def encode_range(source_path, part_path, start, end, output_format=PLAIN, chunk_size=b64engine.CHUNK_SIZE,
+                 on_progress=None, cancel_event=None):
+    """
+    Кодирует байты [start, end) файла и пишет текст в part_path по смещению
+    b64engine.encoded_length(start). start кратно 3, поэтому результат диапазона
+    не зависит от соседних, а паддинг получает только последний диапазон файла.
+    Файл part_path должен быть заранее создан полной длины (b64engine.open_output с length).
+
+    :param output_format: формат, для которого splittable() истинно
+    :return: количество закодированных байт
+    """
+    if start % 3 or not splittable(output_format):
+        raise ValueError("Диапазон должен начинаться с кратного 3 смещения, а формат — допускать деление")
+    with open(source_path, "rb") as src, open(part_path, "r+b") as dst:
+        dst.seek(b64engine.encoded_length(start))
+        mapped = b64engine.map_file(src)
+        if mapped is not None:
+            with mapped, memoryview(mapped) as view, view[start:end] as part:
+                return _encode_mapped(part, dst, output_format, chunk_size, on_progress, cancel_event, None)
+        src.seek(start)
+        return encode_stream(b64engine.LimitedReader(src, end - start), dst, output_format, chunk_size,
+                             on_progress, cancel_event)
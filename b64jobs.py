@@ -0,0 +1,166 @@
+import time
+import functools
+import queue
+import threading
+
+import b64batch
+import b64bundle
+import b64dedup
+
+# === Фоновые задания конвертации ===
+# Конвертация выполняется в отдельном потоке, а интерфейс получает события
+# через потокобезопасную очередь, которую опрашивает из mainloop (after()).
+# Виды событий (кортежи):
+#   ("progress", обработано_байт, всего_байт)
+#   ("file", ConvertResult)
+#   ("error", исключение) — сбой всего задания (обход, кэш, журнал, пулы), не отдельного файла
+#   ("finished", успешно_файлов, отменено)
+
+
+class ConversionJob:
+    """Фоновое задание: конвертирует набор файлов, поддерживает отмену."""
+
+    def __init__(self, jobs, workers=None, output_format=None, dedup=None, schedule="stream"):
+        """
+        :param jobs: итерируемое кортежей (исходный путь, путь результата[, размер]);
+            может быть ленивым (например, обход директории) — тогда он выполняется
+            в фоновом потоке, а total_bytes и scanned растут по мере обхода
+        :param workers: число воркеров для b64batch.convert_many
+        :param output_format: b64formats.OutputFormat; None — стандартный Base64
+        :param dedup: режим b64dedup ("link", "copy", "manifest"); None — без дедупликации
+        :param schedule: порядок обработки (ключ b64batch.SCHEDULES); с "size"
+            конвертация начинается после обхода, зато крупные файлы не остаются в конце
+        """
+        self.jobs = jobs
+        self.workers = workers
+        self.output_format = output_format
+        self.dedup = dedup
+        self.schedule = schedule
+        self.events = queue.Queue()
+        self.total_bytes = 0
+        self.scanned = 0
+        self.scanning = True
+        self._done_bytes = 0
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._thread = None
+        self.error = None  # исключение, прервавшее задание целиком
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """Запрашивает отмену; задание завершится на ближайшей границе блока."""
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def _on_progress(self, delta):
+        with self._lock:
+            self._done_bytes += delta
+            done = self._done_bytes
+        self.events.put(("progress", done, self.total_bytes))
+
+    def _iter_jobs(self):
+        """Пропускает задания дальше, подсчитывая их число и общий объём."""
+        for job in self.jobs:
+            size = job[2] if len(job) > 2 else b64batch.file_size(job[0])
+            with self._lock:
+                self.total_bytes += size
+                self.scanned += 1
+            yield job[0], job[1], size
+        self.scanning = False
+
+    def _run(self):
+        count = 0
+        if self.dedup:
+            convert = functools.partial(b64dedup.convert_deduplicated, mode=self.dedup, schedule=self.schedule)
+        else:
+            convert = b64batch.SCHEDULES[self.schedule]
+        try:
+            for result in convert(
+                self._iter_jobs(),
+                workers=self.workers,
+                on_progress=self._on_progress,
+                cancel_event=self._cancel,
+                output_format=self.output_format,
+            ):
+                if result.error is None:
+                    count += 1
+                self.events.put(("file", result))
+        except Exception as e:
+            # Ошибки файлов приходят в ConvertResult; сюда попадает сбой самого конвейера
+            self.error = e
+            self.events.put(("error", e))
+        finally:
+            self.events.put(("finished", count, self.cancelled))
+
+
+class BundleJob(ConversionJob):
+    """Фоновая упаковка набора файлов в один контейнер b64bundle."""
+
+    def __init__(self, entries, source_dir, output_path):
+        """
+        :param entries: итерируемое (исходный путь, имя в контейнере, размер)
+        :param source_dir: исходная директория (для отчёта)
+        :param output_path: путь контейнера
+        """
+        super().__init__(entries)
+        self.source_dir = source_dir
+        self.output_path = output_path
+
+    def _run(self):
+        count = 0
+        started = time.perf_counter()
+        reported = 0
+
+        def on_progress(total):
+            nonlocal reported
+            self._on_progress(total - reported)
+            reported = total
+
+        try:
+            # Индекс пишется в заголовок, поэтому обход завершается до записи данных
+            entries = []
+            for entry in self.jobs:
+                with self._lock:
+                    self.total_bytes += entry[2]
+                    self.scanned += 1
+                entries.append(entry)
+            self.scanning = False
+            if entries:
+                b64bundle.write_bundle(entries, self.output_path, on_progress, self._cancel)
+                count = len(entries)
+                result = b64batch.ConvertResult(self.source_dir, self.output_path, reported, None,
+                                                time.perf_counter() - started)
+                self.events.put(("file", result))
+        except Exception as e:
+            result = b64batch.ConvertResult(self.source_dir, self.output_path, 0, e, time.perf_counter() - started)
+            self.events.put(("file", result))
+        finally:
+            self.events.put(("finished", count, self.cancelled))
+
+
+def drain_events(job, limit=1000):
+    """
+    Забирает из очереди задания накопившиеся события (не более limit за раз).
+    Промежуточные события прогресса схлопываются — важно только последнее.
+    """
+    events = []
+    progress = None
+    for _ in range(limit):
+        try:
+            event = job.events.get_nowait()
+        except queue.Empty:
+            break
+        if event[0] == "progress":
+            progress = event
+        else:
+            events.append(event)
+    if progress:
+        events.insert(0, progress)
+    return events
@@ -0,0 +1,130 @@
+import os
+import json
+import threading
+
+import b64engine
+
+# === Журнал пакетного задания ===
+# Каждый готовый файл дописывается в журнал отдельной строкой JSON сразу после
+# конвертации. Если запуск прерван (сбой, завершение процесса, отмена), журнал
+# остаётся, и следующий запуск с тем же журналом пропускает уже готовые файлы,
+# продолжая с первого незавершённого. Успешно завершённый запуск удаляет журнал.
+# Оборванная последняя строка (процесс убит во время записи) игнорируется.
+# Крупный файл, прерванный на середине, продолжается с контрольной точки
+# (см. b64engine.AtomicOutput).
+
+JOURNAL_NAME = b64engine.JOURNAL_NAME
+
+
+class JobJournal:
+    """Журнал выполненных заданий одного пакетного запуска."""
+
+    def __init__(self, path, run_key=None):
+        """
+        :param path: файл журнала
+        :param run_key: параметры запуска (строка или JSON-совместимое значение);
+            журнал с другими параметрами не используется для продолжения
+        """
+        self.path = path
+        # Приводим к виду после чтения из JSON (кортежи — списки), чтобы сравнение было точным
+        self.run_key = json.loads(json.dumps(run_key))
+        self.done = {}
+        self.skipped = []
+        self._file = None
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError:
+            return
+        entries = []
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+        if not entries or entries[0].get("run") != self.run_key:
+            return
+        for entry in entries[1:]:
+            if "source" in entry:
+                self.done[entry["source"]] = entry
+
+    def _is_done(self, source, output_path):
+        entry = self.done.get(source)
+        if entry is None or not os.path.exists(entry["output"]):
+            return False
+        # Результат должен лежать там, куда его пишет этот запуск (имя может отличаться датой)
+        if os.path.dirname(entry["output"]) != os.path.dirname(os.path.abspath(output_path)):
+            return False
+        try:
+            st = os.stat(source)
+        except OSError:
+            return False
+        return entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns
+
+    def select(self, jobs):
+        """
+        Лениво пропускает задания, выполненные прерванным запуском.
+        Пропущенные накапливаются в self.skipped парами (источник, результат).
+
+        :param jobs: итерируемое кортежей (исходный путь, путь результата[, размер])
+        """
+        for job in jobs:
+            source = os.path.abspath(job[0])
+            if self._is_done(source, job[1]):
+                self.skipped.append((job[0], self.done[source]["output"]))
+                continue
+            yield job
+
+    def _open(self):
+        if self._file is None:
+            # Журнал переписывается заново (атомарно): выполненное ранее остаётся в нём,
+            # а оборванная строка прерванного запуска не склеивается с новой
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(json.dumps({"run": self.run_key}, ensure_ascii=False) + "\n")
+                for entry in self.done.values():
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, self.path)
+            self._file = open(self.path, "a", encoding="utf-8")
+        return self._file
+
+    def record(self, result):
+        """Записывает успешно сконвертированный файл (ConvertResult)."""
+        if result.error is not None:
+            return
+        source = os.path.abspath(result.source)
+        try:
+            st = os.stat(source)
+        except OSError:
+            return
+        entry = {
+            "source": source,
+            "output": os.path.abspath(result.output),
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+        }
+        with self._lock:
+            f = self._open()
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            # Строка должна дойти до ОС до следующего файла: процесс могут убить в любой момент
+            f.flush()
+            self.done[source] = entry
+
+    def close(self):
+        """Закрывает журнал, оставляя его для продолжения."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def complete(self):
+        """Запуск завершён полностью — журнал больше не нужен."""
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,86 @@
+import os
+import fnmatch
+from collections import namedtuple
+
+import b64engine
+
+# === Ленивый обход директорий ===
+# Построен на os.scandir: тип и размер файла берутся из DirEntry (на Windows —
+# без дополнительных системных вызовов), результаты выдаются по одному,
+# поэтому конвертация начинается до окончания обхода больших директорий.
+
+ScanEntry = namedtuple("ScanEntry", "path size")
+
+# Собственные результаты и манифест не должны попадать в кодирование повторно
+OWN_OUTPUT_PATTERNS = (
+    "*" + b64engine.OUTPUT_SUFFIX, "*" + b64engine.BUNDLE_SUFFIX,
+    "*" + b64engine.PART_SUFFIX, "*" + b64engine.PART_SUFFIX + b64engine.CHECKPOINT_SUFFIX,
+    b64engine.MANIFEST_NAME, b64engine.ALIASES_NAME, b64engine.JOURNAL_NAME,
+)
+
+
+def parse_extensions(text):
+    """
+    Разбирает строку расширений из поля формата: «pdf», «pdf docx», «.pdf, .txt».
+    Пустая строка — все файлы (None).
+    """
+    extensions = tuple(
+        part.strip().lstrip(".")
+        for part in text.replace(",", " ").split()
+        if part.strip().lstrip(".")
+    )
+    return extensions or None
+
+
+def _matches_any(name, relative, patterns):
+    return any(fnmatch.fnmatch(name, p) or fnmatch.fnmatch(relative, p) for p in patterns)
+
+
+def scan(root, extensions=None, recursive=False, include=None, exclude=None, on_error=None):
+    """
+    Лениво обходит директорию и выдаёт ScanEntry(path, size) для подходящих файлов.
+
+    :param root: корневая директория
+    :param extensions: расширения без точки (например: ("pdf", "docx")); None — все файлы
+    :param recursive: заходить в поддиректории
+    :param include: glob-шаблоны; файл подходит, если совпадает хотя бы с одним
+        (по имени или по пути относительно root, с разделителем /)
+    :param exclude: glob-шаблоны исключения для файлов и поддиректорий
+    :param on_error: колбэк для OSError при чтении директории; по умолчанию ошибка пропускается
+    """
+    suffixes = tuple(f".{ext}" for ext in extensions) if extensions else None
+    stack = [""]
+    while stack:
+        relative_dir = stack.pop()
+        directory = os.path.join(root, relative_dir) if relative_dir else root
+        try:
+            iterator = os.scandir(directory)
+        except OSError as e:
+            if on_error:
+                on_error(e)
+            continue
+        subdirs = []
+        with iterator:
+            for entry in iterator:
+                relative = f"{relative_dir}/{entry.name}" if relative_dir else entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive and not (exclude and _matches_any(entry.name, relative, exclude)):
+                            subdirs.append(relative)
+                        continue
+                    if not entry.is_file():
+                        continue
+                    if suffixes and not entry.name.endswith(suffixes):
+                        continue
+                    if include and not _matches_any(entry.name, relative, include):
+                        continue
+                    if exclude and _matches_any(entry.name, relative, exclude):
+                        continue
+                    size = entry.stat().st_size
+                except OSError as e:
+                    if on_error:
+                        on_error(e)
+                    continue
+                yield ScanEntry(entry.path, size)
+        # Директория закрыта до спуска в поддиректории — не держим открытыми дескрипторы
+        stack.extend(reversed(subdirs))
@@ -0,0 +1,263 @@
+import sys
+import socket
+import struct
+import importlib.util
+import argparse
+import threading
+import socketserver
+
+import b64engine
+import b64formats
+
+# Попытка импорта bottle (необязательная зависимость для режима HTTP-сервиса)
+bottle_available = False
+try:
+    import bottle
+    bottle_available = True
+except ImportError:
+    bottle = None
+
+# gevent необязателен (много соединений в одном потоке); импортируется
+# только при запуске сервера — ему нужен monkey.patch_all()
+gevent_available = importlib.util.find_spec("gevent") is not None
+
+# === Локальный HTTP-сервис конвертации ===
+#   POST /encode?format=<пресет>&name=<имя файла>  — тело: двоичные данные, ответ: Base64
+#   POST /decode                                   — тело: Base64, ответ: двоичные данные
+#   GET  /status                                   — занятость воркеров (JSON)
+# Тело запроса читается блоками по мере отправки ответа, поэтому память на запрос
+# постоянна, а медленный клиент сам притормаживает чтение (обратное давление TCP).
+# Одновременно конвертируется не больше workers запросов; остальные ждут
+# свободного слота до queue_timeout секунд, затем получают 503.
+# С gevent ответ без Content-Length отдаётся chunked (HTTP/1.1), и тело запроса
+# тоже может прийти chunked; без gevent работает многопоточный wsgiref (HTTP/1.0).
+# Ошибка после начала ответа (например, некорректный Base64 в середине /decode):
+# с gevent ответ обрывается без завершающего chunk, а в wsgiref, где конец тела —
+# это закрытие соединения, оно сбрасывается (RST), чтобы клиент не принял
+# усечённые данные за полный ответ.
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8642
+SERVER_CHUNK_SIZE = 64 * 1024
+DEFAULT_WORKERS = 8
+QUEUE_TIMEOUT = 30.0
+ABORT_KEY = "b64server.abort"  # ключ environ: колбэк аварийного закрытия соединения
+
+
+class WorkerSlots:
+    """Ограниченный пул слотов конвертации."""
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.active = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        # После monkey.patch_all() семафор кооперативный (gevent)
+        self._semaphore = threading.BoundedSemaphore(workers)
+
+    def acquire(self, timeout):
+        if not self._semaphore.acquire(timeout=timeout):
+            with self._lock:
+                self.rejected += 1
+            return False
+        with self._lock:
+            self.active += 1
+        return True
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
+        self._semaphore.release()
+
+
+def request_body(environ):
+    """
+    Возвращает поток тела запроса или None, если длина неизвестна,
+    а сервер не умеет читать chunked-запросы.
+    """
+    stream = environ["wsgi.input"]
+    length = environ.get("CONTENT_LENGTH")
+    if length:
+        return b64engine.LimitedReader(stream, int(length))
+    if environ.get("wsgi.input_terminated"):
+        # Сервер (gevent) сам разбирает chunked и сообщает о конце тела
+        return stream
+    return None
+
+
+def decode_chunks(src, chunk_size=SERVER_CHUNK_SIZE):
+    """Потоково декодирует src и выдаёт блоки двоичных данных."""
+    decoder = b64engine.Base64Decoder()
+    while True:
+        block = src.read(chunk_size)
+        if not block:
+            break
+        data = decoder.feed(block)
+        if data:
+            yield data
+    decoder.finish()
+
+
+def create_app(workers=DEFAULT_WORKERS, queue_timeout=QUEUE_TIMEOUT):
+    """Создаёт WSGI-приложение bottle."""
+    if not bottle_available:
+        raise RuntimeError("Для HTTP-сервиса нужна библиотека bottle: pip install bottle")
+    app = bottle.Bottle()
+    slots = WorkerSlots(workers)
+
+    def stream(chunks):
+        """
+        Занимает слот на всё время ответа. Ошибка в первом блоке ещё может
+        стать кодом 400; после начала ответа соединение просто обрывается,
+        и клиент видит незавершённый ответ.
+        """
+        src = request_body(bottle.request.environ)
+        if src is None:
+            raise bottle.HTTPError(411, "Нужен Content-Length или chunked-запрос через gevent")
+        if not slots.acquire(queue_timeout):
+            raise bottle.HTTPError(503, "Все воркеры заняты", headers={"Retry-After": "1"})
+        try:
+            iterator = chunks(src)
+            try:
+                first = next(iterator, b"")
+            except b64engine.InvalidBase64Error as e:
+                raise bottle.HTTPError(400, str(e))
+        except BaseException:
+            slots.release()
+            raise
+
+        abort = bottle.request.environ.get(ABORT_KEY)
+
+        def body():
+            try:
+                yield first
+                yield from iterator
+            except Exception:
+                if abort:
+                    abort()
+                raise
+            finally:
+                slots.release()
+
+        return body()
+
+    @app.post("/encode")
+    def encode():
+        query = bottle.request.query
+        try:
+            output_format = b64formats.PRESETS[query.get("format") or "standard"]
+            wrap = int(query.get("wrap") or output_format.wrap)
+            output_format = b64formats.validate_format(output_format._replace(wrap=wrap))
+        except (KeyError, ValueError) as e:
+            raise bottle.HTTPError(400, f"Некорректный формат: {e}")
+        mime_type = "application/octet-stream"
+        if query.get("name"):
+            mime_type = b64formats.guess_mime_type(query.get("name"))
+        bottle.response.content_type = "text/plain; charset=ascii"
+        return stream(lambda src: b64formats.encode_chunks(src, output_format, mime_type, SERVER_CHUNK_SIZE))
+
+    @app.post("/decode")
+    def decode():
+        bottle.response.content_type = "application/octet-stream"
+        return stream(decode_chunks)
+
+    @app.get("/status")
+    def status():
+        return {"workers": slots.workers, "active": slots.active, "rejected": slots.rejected}
+
+    return app
+
+
+def _threading_server_adapter():
+    """Адаптер bottle: wsgiref с потоком на соединение (встроенный wsgiref однопоточный)."""
+    from wsgiref.simple_server import make_server, WSGIServer, WSGIRequestHandler
+
+    class ThreadingWSGIServer(socketserver.ThreadingMixIn, WSGIServer):
+        daemon_threads = True
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.aborted = set()
+            self.aborted_lock = threading.Lock()
+
+        def shutdown_request(self, request):
+            with self.aborted_lock:
+                aborted = request in self.aborted
+                self.aborted.discard(request)
+            if not aborted:
+                return super().shutdown_request(request)
+            # Без shutdown(SHUT_WR): FIN выглядел бы как нормальный конец ответа.
+            # SO_LINGER с нулевым временем — close() отправляет RST
+            request.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+            self.close_request(request)
+
+    class QuietHandler(WSGIRequestHandler):
+        def get_environ(self):
+            environ = super().get_environ()
+            environ[ABORT_KEY] = self.abort
+            return environ
+
+        def abort(self):
+            with self.server.aborted_lock:
+                self.server.aborted.add(self.request)
+
+        def log_request(self, *args, **kwargs):
+            if not self.server.quiet:
+                super().log_request(*args, **kwargs)
+
+    class ThreadingWSGIRefServer(bottle.ServerAdapter):
+        def run(self, app):
+            server = make_server(self.host, self.port, app, ThreadingWSGIServer, QuietHandler)
+            server.quiet = self.quiet
+            server.serve_forever()
+
+    return ThreadingWSGIRefServer
+
+
+def run_server(host=DEFAULT_HOST, port=DEFAULT_PORT, workers=DEFAULT_WORKERS, queue_timeout=QUEUE_TIMEOUT,
+               use_gevent=None, quiet=False):
+    """
+    Запускает сервис (блокирующий вызов).
+
+    :param use_gevent: None — gevent, если он установлен
+    """
+    if use_gevent is None:
+        use_gevent = gevent_available
+    if use_gevent:
+        from gevent import monkey
+        monkey.patch_all()
+    app = create_app(workers, queue_timeout)
+    server = "gevent" if use_gevent else _threading_server_adapter()
+    bottle.run(app, server=server, host=host, port=port, quiet=quiet)
+
+
+def parse_address(text):
+    """Разбирает «[хост:]порт»."""
+    host, _, port = text.rpartition(":")
+    return host or DEFAULT_HOST, int(port)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="b64server", description="Локальный HTTP-сервис конвертации Base64.")
+    parser.add_argument("address", nargs="?", default=f"{DEFAULT_HOST}:{DEFAULT_PORT}",
+                        help=f"[хост:]порт (по умолчанию {DEFAULT_HOST}:{DEFAULT_PORT})")
+    parser.add_argument("-j", "--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"одновременных конвертаций (по умолчанию {DEFAULT_WORKERS})")
+    parser.add_argument("--queue-timeout", type=float, default=QUEUE_TIMEOUT,
+                        help="сколько секунд запрос ждёт свободного воркера до ответа 503")
+    parser.add_argument("--no-gevent", action="store_true", help="многопоточный wsgiref вместо gevent")
+    parser.add_argument("-q", "--quiet", action="store_true", help="не выводить журнал запросов")
+    args = parser.parse_args(argv)
+    if not bottle_available:
+        print("Для HTTP-сервиса нужна библиотека bottle: pip install bottle", file=sys.stderr)
+        return 1
+    try:
+        host, port = parse_address(args.address)
+    except ValueError:
+        parser.error(f"Некорректный адрес: {args.address}")
+    run_server(host, port, args.workers, args.queue_timeout, False if args.no_gevent else None, args.quiet)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
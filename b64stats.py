@@ -0,0 +1,230 @@
+import os
+import json
+import time
+import threading
+from collections import Counter
+
+# === Инструментирование конвертации ===
+# FileStats собирает по одному файлу время чтения, кодирования и записи:
+# потоки src и dst оборачиваются TimedReader/TimedWriter, а кодирование —
+# всё остальное время. Без статистики обёрток нет, и в горячем цикле
+# не выполняется ни одной лишней операции.
+# RunRecorder пишет журнал запуска в JSON Lines (строка на файл и итоговая
+# строка summary) и при необходимости собирает профиль cProfile.
+# При чтении через mmap чтение идёт внутри кодирования (подкачка страниц),
+# поэтому для таких файлов read_s равно нулю.
+
+SLOWEST_FILES = 10
+
+
+class FileStats:
+    """Замеры одного файла; передаётся между процессами вместе с ConvertResult."""
+
+    __slots__ = ("read_s", "encode_s", "write_s", "bytes_in", "bytes_out", "started", "queue_wait_s", "worker")
+
+    def __init__(self):
+        self.read_s = 0.0
+        self.encode_s = 0.0
+        self.write_s = 0.0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.started = time.perf_counter()
+        self.queue_wait_s = 0.0
+        self.worker = f"{os.getpid()}/{threading.current_thread().name}"
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def reader(self, src):
+        return TimedReader(src, self)
+
+    def writer(self, dst):
+        return TimedWriter(dst, self)
+
+    def finish(self, elapsed):
+        """Кодированию приписывается время, не ушедшее на чтение и запись."""
+        self.encode_s = max(0.0, elapsed - self.read_s - self.write_s)
+
+    def as_dict(self):
+        return {
+            "read_s": round(self.read_s, 6),
+            "encode_s": round(self.encode_s, 6),
+            "write_s": round(self.write_s, 6),
+            "queue_wait_s": round(self.queue_wait_s, 6),
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "worker": self.worker,
+        }
+
+
+class TimedReader:
+    """Обёртка потока чтения: считает байты и время в read/readinto."""
+
+    def __init__(self, stream, stats):
+        self.stream = stream
+        self.stats = stats
+
+    def read(self, size=-1):
+        started = time.perf_counter()
+        data = self.stream.read(size)
+        self.stats.read_s += time.perf_counter() - started
+        self.stats.bytes_in += len(data)
+        return data
+
+    def readinto(self, buffer):
+        started = time.perf_counter()
+        n = self.stream.readinto(buffer)
+        self.stats.read_s += time.perf_counter() - started
+        self.stats.bytes_in += n or 0
+        return n
+
+
+class TimedWriter:
+    """Обёртка потока записи: считает байты и время в write."""
+
+    def __init__(self, stream, stats):
+        self.stream = stream
+        self.stats = stats
+
+    def write(self, data):
+        started = time.perf_counter()
+        n = self.stream.write(data)
+        self.stats.write_s += time.perf_counter() - started
+        self.stats.bytes_out += len(data)
+        return n
+
+
+class ThreadProfiler:
+    """
+    cProfile для пула потоков: каждый вызов профилируется отдельно,
+    результаты сливаются в один pstats.Stats. Файлы, ушедшие в пул
+    процессов, в профиль не попадают.
+    """
+
+    def __init__(self):
+        self._stats = None
+        self._lock = threading.Lock()
+
+    def call(self, function, *args):
+        import cProfile
+        profile = cProfile.Profile()
+        try:
+            return profile.runcall(function, *args)
+        finally:
+            with self._lock:
+                if self._stats is None:
+                    import pstats
+                    self._stats = pstats.Stats(profile)
+                else:
+                    self._stats.add(profile)
+
+    def dump(self, path):
+        with self._lock:
+            if self._stats is not None:
+                self._stats.dump_stats(path)
+
+
+class RunRecorder:
+    """Журнал и итоги одного запуска пакетной конвертации."""
+
+    def __init__(self, log_path=None, profile_path=None, workers=1):
+        """
+        :param log_path: файл журнала JSON Lines; None — только итоги в памяти
+        :param profile_path: файл для pstats (открывается python -m pstats); None — без профиля
+        :param workers: число воркеров — для расчёта их загрузки
+        """
+        self.workers = workers
+        self.profile_path = profile_path
+        self.profiler = ThreadProfiler() if profile_path else None
+        self.started = time.perf_counter()
+        self.files = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.busy_s = 0.0
+        self.stage_s = Counter()
+        self.errors = Counter()
+        self.slowest = []
+        self._log = open(log_path, "w", encoding="utf-8") if log_path else None
+        self._lock = threading.Lock()
+
+    def record(self, result):
+        """Учитывает ConvertResult; вызывается потребителем результатов."""
+        stats = getattr(result, "stats", None)
+        entry = {
+            "source": result.source,
+            "output": result.output,
+            "size": result.size,
+            "elapsed_s": round(result.elapsed, 6),
+            "error": None if result.error is None else f"{type(result.error).__name__}: {result.error}",
+        }
+        if stats is not None:
+            entry.update(stats.as_dict())
+        with self._lock:
+            self.files += 1
+            self.busy_s += result.elapsed
+            if result.error is not None:
+                self.errors[type(result.error).__name__] += 1
+            else:
+                self.bytes_in += result.size
+            if stats is not None:
+                self.bytes_out += stats.bytes_out
+                self.stage_s["read_s"] += stats.read_s
+                self.stage_s["encode_s"] += stats.encode_s
+                self.stage_s["write_s"] += stats.write_s
+                self.stage_s["queue_wait_s"] += stats.queue_wait_s
+            self.slowest.append((result.elapsed, result.source))
+            if len(self.slowest) > SLOWEST_FILES * 4:
+                self.slowest = sorted(self.slowest, reverse=True)[:SLOWEST_FILES]
+            if self._log:
+                self._log.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def summary(self):
+        wall = time.perf_counter() - self.started
+        return {
+            "files": self.files,
+            "errors": dict(self.errors),
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "wall_s": round(wall, 6),
+            "throughput_mib_s": round(self.bytes_in / (1024 * 1024) / wall, 3) if wall else 0.0,
+            "stages_s": {name: round(value, 6) for name, value in self.stage_s.items()},
+            "worker_utilization": round(self.busy_s / (wall * self.workers), 3) if wall else 0.0,
+            "slowest": [
+                {"source": source, "elapsed_s": round(elapsed, 6)}
+                for elapsed, source in sorted(self.slowest, reverse=True)[:SLOWEST_FILES]
+            ],
+        }
+
+    def close(self):
+        """Дописывает итоговую строку, сохраняет профиль; возвращает итоги."""
+        summary = self.summary()
+        with self._lock:
+            if self._log:
+                self._log.write(json.dumps({"summary": summary}, ensure_ascii=False) + "\n")
+                self._log.close()
+                self._log = None
+        if self.profiler:
+            self.profiler.dump(self.profile_path)
+        return summary
+
+
+def format_summary(summary):
+    """Итоги запуска в виде строк для вывода человеку."""
+    lines = [
+        f"Файлов: {summary['files']}, ошибок: {sum(summary['errors'].values())}"
+        + (f" ({', '.join(f'{k}: {v}' for k, v in summary['errors'].items())})" if summary["errors"] else ""),
+        f"Прочитано: {summary['bytes_in']} байт, записано: {summary['bytes_out']} байт "
+        f"за {summary['wall_s']:.3f} с ({summary['throughput_mib_s']} МиБ/с)",
+        f"Загрузка воркеров: {summary['worker_utilization']:.0%}",
+    ]
+    stages = summary["stages_s"]
+    if stages:
+        lines.append("Стадии, с: " + ", ".join(f"{name[:-2]} {value:.3f}" for name, value in stages.items()))
+    if summary["slowest"]:
+        lines.append("Самые медленные файлы:")
+        lines += [f"  {item['elapsed_s']:.3f} с  {item['source']}" for item in summary["slowest"]]
+    return lines
@@ -0,0 +1,182 @@
+import os
+import time
+import threading
+from collections import namedtuple, defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import b64batch
+import b64engine
+import b64formats
+
+# === Проверка результатов ===
+# Исходный файл заново кодируется блоками в том же формате, и каждый блок
+# сравнивается с соответствующим участком .base64.txt по мере чтения: память
+# на файл постоянна, временных файлов нет, а при первом расхождении чтение
+# прекращается. Так проверяется весь путь «исходник → результат» вместе
+# с переносами строк и префиксом data: URI.
+# Результаты со сжатием сверяются так же — они должны быть получены той же
+# версией библиотеки сжатия (zlib стабилен, у zstd вывод может меняться).
+# Дата в имени результата не обязана совпадать с сегодняшней: берётся самый
+# свежий <имя>-<ГГГГ-ММ-ДД>.base64.txt в каталоге (OutputIndex).
+
+VERIFY_OK = "ok"
+VERIFY_MISMATCH = "mismatch"  # содержимое отличается или есть лишние данные
+VERIFY_TRUNCATED = "truncated"  # результат обрывается раньше, чем нужно
+VERIFY_MISSING = "missing"  # результата нет
+VERIFY_ERROR = "error"  # ошибка чтения
+STATUSES = (VERIFY_OK, VERIFY_MISMATCH, VERIFY_TRUNCATED, VERIFY_MISSING, VERIFY_ERROR)
+
+# status — один из STATUSES; detail — пояснение для человека; offset — позиция
+# (в символах результата) первого расхождения или обрыва; size — размер исходного файла
+VerifyResult = namedtuple("VerifyResult", "source output status detail offset size elapsed",
+                          defaults=("", None, 0, 0.0))
+
+
+def _first_difference(actual, expected):
+    """Позиция первого различия (или длина общей части); срезы сравниваются в C, без цикла по байтам."""
+    lo, hi = 0, min(len(actual), len(expected))
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if actual[lo:mid + 1] == expected[lo:mid + 1]:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def verify_file(source_path, output_path, output_format=None, chunk_size=b64engine.CHUNK_SIZE, on_progress=None,
+                cancel_event=None):
+    """
+    Сверяет результат с исходным файлом потоково.
+
+    :param output_format: b64formats.OutputFormat, в котором создан результат;
+        None — стандартный Base64
+    :param on_progress: колбэк, получает число прочитанных байт исходного файла
+    :param cancel_event: объект с методом is_set(); при отмене — ConversionCancelled
+    :return: VerifyResult
+    """
+    output_format = output_format or b64formats.PLAIN
+    started = time.perf_counter()
+
+    def result(status, detail="", offset=None, size=0):
+        return VerifyResult(source_path, output_path, status, detail, offset, size, time.perf_counter() - started)
+
+    if not os.path.isfile(output_path):
+        return result(VERIFY_MISSING, "Результат не найден")
+    size = 0
+    try:
+        with open(source_path, "rb") as src, open(output_path, "rb") as out:
+            size = os.fstat(src.fileno()).st_size
+            position = 0
+            mime_type = b64formats.guess_mime_type(source_path)
+            for expected in b64formats.encode_chunks(src, output_format, mime_type, chunk_size):
+                if cancel_event is not None and cancel_event.is_set():
+                    raise b64engine.ConversionCancelled()
+                actual = out.read(len(expected))
+                if actual != expected:
+                    offset = position + _first_difference(actual, expected)
+                    if offset == position + len(actual):
+                        return result(VERIFY_TRUNCATED, f"Результат обрывается на символе {offset}", offset, size)
+                    return result(VERIFY_MISMATCH, f"Расхождение с символа {offset}", offset, size)
+                position += len(expected)
+                if on_progress:
+                    on_progress(src.tell())
+            if out.read(1):
+                return result(VERIFY_MISMATCH, f"Лишние данные после символа {position}", position, size)
+    except OSError as e:
+        return result(VERIFY_ERROR, str(e), size=size)
+    return result(VERIFY_OK, size=size)
+
+
+class OutputIndex:
+    """
+    Находит результаты по имени исходного файла с любой датой в имени.
+    Каталог читается один раз, поэтому поиск по директории из тысяч файлов
+    не требует отдельного обхода на каждый файл.
+    """
+
+    def __init__(self):
+        self._listings = {}
+        self._lock = threading.Lock()
+
+    def _listing(self, directory):
+        with self._lock:
+            listing = self._listings.get(directory)
+            if listing is None:
+                listing = defaultdict(list)
+                try:
+                    names = os.listdir(directory or ".")
+                except OSError:
+                    names = []
+                for name in names:
+                    if not name.endswith(b64engine.OUTPUT_SUFFIX):
+                        continue
+                    stem = name[:-len(b64engine.OUTPUT_SUFFIX)]
+                    match = b64engine.DATE_SUFFIX_RE.search(stem)
+                    if match:
+                        listing[stem[:match.start()]].append(name)
+                self._listings[directory] = listing
+            return listing
+
+    def find(self, source_path, output_path):
+        """
+        Возвращает output_path, если он существует, иначе самый свежий
+        результат того же файла в каталоге output_path; если нет и его — output_path.
+        """
+        if os.path.exists(output_path):
+            return output_path
+        directory = os.path.dirname(output_path)
+        stem = os.path.splitext(os.path.basename(source_path))[0]
+        names = self._listing(directory).get(stem)
+        if not names:
+            return output_path
+        # Дата в формате ГГГГ-ММ-ДД — самое свежее имя и лексикографически последнее
+        return os.path.join(directory, max(names))
+
+
+def locate_outputs(jobs, index=None):
+    """
+    Подставляет в задания (исходный путь, путь результата[, размер]) существующие
+    результаты с любой датой в имени (см. OutputIndex).
+    """
+    index = index or OutputIndex()
+    for job in jobs:
+        yield (job[0], index.find(job[0], job[1])) + tuple(job[2:])
+
+
+def verify_many(jobs, workers=None, output_format=None, on_progress=None, cancel_event=None):
+    """
+    Параллельно сверяет набор результатов. Задания читаются лениво, в работе
+    не больше b64batch.MAX_PENDING_PER_WORKER заданий на воркер.
+
+    :param jobs: итерируемое кортежей (исходный путь, путь результата[, размер])
+    :param on_progress: колбэк, получает прирост прочитанных байт; может вызываться из разных потоков
+    :param cancel_event: объект с методом is_set(); после установки новые файлы не берутся
+    :return: генератор VerifyResult в порядке завершения
+    """
+    workers = max(1, workers or b64batch.DEFAULT_WORKERS)
+
+    def check(source_path, output_path):
+        try:
+            return verify_file(source_path, output_path, output_format,
+                               on_progress=b64batch.delta_reporter(on_progress), cancel_event=cancel_event)
+        except b64engine.ConversionCancelled:
+            return VerifyResult(source_path, output_path, VERIFY_ERROR, "Проверка отменена")
+
+    pool = ThreadPoolExecutor(max_workers=workers)
+    pending = set()
+    try:
+        for job in jobs:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            pending.add(pool.submit(check, job[0], job[1]))
+            if len(pending) >= workers * b64batch.MAX_PENDING_PER_WORKER:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    finally:
+        pool.shutdown(cancel_futures=True)
@@ -0,0 +1,105 @@
+import os
+import sys
+import base64
+import shutil
+import tempfile
+import threading
+import unittest
+from concurrent.futures import Future
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import b64batch  # noqa: E402
+import b64engine  # noqa: E402
+
+# Пороги планировщика занижены, чтобы пачки, отдельные файлы и диапазоны
+# получались на файлах в несколько мегабайт
+SMALL_FILE = 4 * 1024
+SPLIT_THRESHOLD = 2 * b64engine.CHUNK_SIZE
+RANGE_SIZE = b64engine.CHUNK_SIZE
+SIZES = [0, 1, 2, 3, 100, 4000, 50 * 1024 + 1, 3 * b64engine.CHUNK_SIZE + 5, 2 * b64engine.CHUNK_SIZE + 1]
+
+
+class ConvertScheduledTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.data = {}
+        self.jobs = []
+        for index, size in enumerate(SIZES):
+            source_path = os.path.join(self.directory, f"file{index}.bin")
+            data = os.urandom(size)
+            with open(source_path, "wb") as f:
+                f.write(data)
+            self.data[source_path] = data
+            self.jobs.append((source_path, source_path + ".b64"))
+
+    def convert(self, jobs=None, **kwargs):
+        kwargs.setdefault("workers", 2)
+        return list(b64batch.convert_scheduled(jobs or self.jobs, small_file=SMALL_FILE,
+                                               split_threshold=SPLIT_THRESHOLD, range_size=RANGE_SIZE, **kwargs))
+
+    def assert_encoded(self, source_path, output_path):
+        with open(output_path, "rb") as f:
+            self.assertEqual(f.read(), base64.b64encode(self.data[source_path]))
+
+    def assert_no_parts(self):
+        leftovers = [name for name in os.listdir(self.directory) if b64engine.PART_SUFFIX in name]
+        self.assertEqual(leftovers, [])
+
+    def test_plan_uses_every_kind(self):
+        tasks = b64batch.plan_tasks(self.jobs, 2, small_file=SMALL_FILE, split_threshold=SPLIT_THRESHOLD,
+                                    range_size=RANGE_SIZE)
+        self.assertEqual({task.kind for task in tasks}, {"split", "file", "batch"})
+
+    def test_round_trip_threads(self):
+        results = self.convert(process_threshold=None)
+        self.assertEqual(len(results), len(self.jobs))
+        for result in results:
+            self.assertIsNone(result.error)
+            self.assert_encoded(result.source, result.output)
+        self.assert_no_parts()
+
+    def test_round_trip_processes(self):
+        results = self.convert(process_threshold=0)
+        self.assertEqual(len(results), len(self.jobs))
+        for result in results:
+            self.assertIsNone(result.error)
+            self.assert_encoded(result.source, result.output)
+        self.assert_no_parts()
+
+    def test_cancel_leaves_no_part(self):
+        cancel_event = threading.Event()
+        results = self.convert(process_threshold=None, on_progress=lambda delta: cancel_event.set(),
+                               cancel_event=cancel_event)
+        for result in results:
+            if result.error is None:
+                self.assert_encoded(result.source, result.output)
+        self.assert_no_parts()
+
+    def test_resume_skips_completed_ranges(self):
+        source_path, output_path = self.jobs[SIZES.index(3 * b64engine.CHUNK_SIZE + 5)]
+        size = len(self.data[source_path])
+        ranges = b64batch.split_ranges(size, 2, RANGE_SIZE)
+        # Прерванный запуск: готов только первый диапазон
+        split_file = b64batch._SplitFile((source_path, output_path, size), ranges)
+        future = Future()
+        split_file.running[future] = ranges[0]
+        future.set_result(b64batch.encode_range(source_path, split_file.output.part_path, *ranges[0]))
+        split_file.range_done(future)
+        split_file.output.keep()
+
+        progress = []
+        with mock.patch.object(b64batch, "encode_range", wraps=b64batch.encode_range) as encode_range:
+            results = self.convert([(source_path, output_path)], process_threshold=None, on_progress=progress.append)
+        self.assertIsNone(results[0].error)
+        self.assert_encoded(source_path, output_path)
+        self.assertEqual(encode_range.call_count, len(ranges) - 1)
+        self.assertEqual(sum(progress), size)
+        self.assert_no_parts()
+
+
+if __name__ == "__main__":
+    unittest.main()
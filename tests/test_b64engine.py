@@ -0,0 +1,174 @@
+import io
+import os
+import sys
+import base64
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import b64engine  # noqa: E402
+import b64formats  # noqa: E402
+
+
+def decode(text, chunk_size=b64engine.DECODE_CHUNK_SIZE):
+    dst = io.BytesIO()
+    b64engine.decode_stream(io.BytesIO(text), dst, chunk_size)
+    return dst.getvalue()
+
+
+class DecodeTest(unittest.TestCase):
+
+    def test_round_trip_across_block_boundaries(self):
+        for size in (0, 1, 2, 3, 4, 5, 100, 1001):
+            data = os.urandom(size)
+            text = base64.b64encode(data)
+            for chunk_size in (1, 3, 5, 4096):
+                self.assertEqual(decode(text, chunk_size), data, (size, chunk_size))
+
+    def test_whitespace_is_skipped(self):
+        data = os.urandom(200)
+        text = base64.encodebytes(data).replace(b"\n", b"\r\n")
+        self.assertEqual(decode(text, 7), data)
+        self.assertEqual(decode(b" QUFB\tQUFB \n"), b"AAAAAA")
+
+    def test_padding_inside_block(self):
+        with self.assertRaises(b64engine.InvalidBase64Error):
+            decode(b"QQ==QUFB")
+
+    def test_padding_across_feed_calls(self):
+        decoder = b64engine.Base64Decoder()
+        self.assertEqual(decoder.feed(b"QQ=="), b"A")
+        with self.assertRaises(b64engine.InvalidBase64Error):
+            decoder.feed(b"QUFB")
+
+    def test_truncated(self):
+        with self.assertRaises(b64engine.InvalidBase64Error):
+            decode(b"QUFBQU")
+        with self.assertRaises(b64engine.InvalidBase64Error):
+            decode(b"QUFBQU", 2)
+
+    def test_invalid_character(self):
+        with self.assertRaises(b64engine.InvalidBase64Error):
+            decode(b"QU!B")
+        with self.assertRaises(b64engine.InvalidBase64Error):
+            decode(b"QUF-")
+
+    def test_failed_decode_leaves_no_output(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        source_path = os.path.join(directory, "bad.base64.txt")
+        output_path = os.path.join(directory, "bad")
+        with open(source_path, "wb") as f:
+            f.write(base64.b64encode(os.urandom(300)) + b"QU")
+        with self.assertRaises(b64engine.InvalidBase64Error):
+            b64engine.decode_file(source_path, output_path, chunk_size=64)
+        self.assertEqual(os.listdir(directory), ["bad.base64.txt"])
+
+
+# Контрольные точки на файлах в сотни КиБ: блок 3 КиБ, точка каждые 30 КиБ
+CHUNK = 3 * 1024
+CHECKPOINT_BYTES = 30 * 1024
+
+
+class CheckpointTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.source_path = os.path.join(self.directory, "big.bin")
+        self.output_path = os.path.join(self.directory, "big.base64.txt")
+        self.data = os.urandom(200 * 1024 + 1)
+        with open(self.source_path, "wb") as f:
+            f.write(self.data)
+        patcher = mock.patch.object(b64engine, "CHECKPOINT_BYTES", CHECKPOINT_BYTES)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def interrupt(self, use_mmap, at=100 * 1024):
+        def on_progress(total):
+            if total >= at:
+                raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            b64engine.encode_file(self.source_path, self.output_path, CHUNK, on_progress, use_mmap=use_mmap)
+        self.assertFalse(os.path.exists(self.output_path))
+        checkpoint = b64engine.load_checkpoint(self.output_path, self.source_path)
+        self.assertIsNotNone(checkpoint)
+        return checkpoint
+
+    def assert_encoded(self):
+        with open(self.output_path, "rb") as f:
+            self.assertEqual(f.read(), base64.b64encode(self.data))
+        self.assertEqual(sorted(os.listdir(self.directory)), ["big.base64.txt", "big.bin"])
+
+    def check_resume(self, use_mmap):
+        checkpoint = self.interrupt(use_mmap)
+        self.assertGreater(checkpoint["offset"], 0)
+        progress = []
+        total = b64engine.encode_file(self.source_path, self.output_path, CHUNK, progress.append, use_mmap=use_mmap)
+        self.assertEqual(total, len(self.data))
+        # Продолжение начинается с точки, а не с нуля
+        self.assertGreater(progress[0], checkpoint["offset"])
+        self.assert_encoded()
+
+    def test_resume_mmap(self):
+        self.check_resume(True)
+
+    def test_resume_buffered(self):
+        self.check_resume(False)
+
+    def test_interrupted_on_one_path_resumes_on_other(self):
+        self.interrupt(True)
+        b64engine.encode_file(self.source_path, self.output_path, CHUNK, use_mmap=False)
+        self.assert_encoded()
+
+    def test_changed_source_restarts(self):
+        self.interrupt(False)
+        self.data = self.data[:-1] + bytes([self.data[-1] ^ 1]) + b"x"
+        with open(self.source_path, "wb") as f:
+            f.write(self.data)
+        self.assertIsNone(b64engine.load_checkpoint(self.output_path, self.source_path))
+        b64engine.encode_file(self.source_path, self.output_path, CHUNK, use_mmap=False)
+        self.assert_encoded()
+
+    def test_checkpoint_of_other_mode_is_rejected(self):
+        self.interrupt(False)
+        self.assertIsNone(b64engine.load_checkpoint(self.output_path, self.source_path,
+                                                    b64engine.CHECKPOINT_RANGES))
+        # Другой формат начинает временный файл заново и удаляет чужую точку
+        urlsafe = b64formats.OutputFormat(alphabet="urlsafe")
+        b64formats.encode_file(self.source_path, self.output_path, urlsafe, CHUNK, use_mmap=False)
+        with open(self.output_path, "rb") as f:
+            self.assertEqual(f.read(), base64.urlsafe_b64encode(self.data))
+        self.assertEqual(sorted(os.listdir(self.directory)), ["big.base64.txt", "big.bin"])
+
+    def test_ranges_checkpoint_is_not_resumed_sequentially(self):
+        length = b64engine.encoded_length(len(self.data))
+        output = b64engine.open_output(self.output_path, length=length)
+        output.checkpoint(dict(b64engine.source_state(self.source_path, b64engine.CHECKPOINT_RANGES),
+                               ranges=[[0, len(self.data)]], completed=[], output_length=length))
+        output.keep()
+        self.assertIsNone(b64engine.load_checkpoint(self.output_path, self.source_path))
+        b64engine.encode_file(self.source_path, self.output_path, CHUNK, use_mmap=False)
+        self.assert_encoded()
+
+    def test_cancel_discards_checkpoint(self):
+        self.interrupt(False)
+
+        class Cancel:
+            calls = 0
+
+            def is_set(self):
+                self.calls += 1
+                return self.calls > 3
+
+        with self.assertRaises(b64engine.ConversionCancelled):
+            b64engine.encode_file(self.source_path, self.output_path, CHUNK, cancel_event=Cancel(), use_mmap=False)
+        self.assertEqual(os.listdir(self.directory), ["big.bin"])
+
+
+if __name__ == "__main__":
+    unittest.main()